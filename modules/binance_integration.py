@@ -9,9 +9,44 @@ import aiohttp
 import asyncio
 from aiohttp import ClientTimeout, WSMsgType # Додано WSMsgType
 # --- КІНЕЦЬ ЗМІНИ ---
+import functools
+import inspect
 import json
+import random
+import re
+import socket
+import sys
+import threading
+# HTTP/2 клієнт для підписаних запитів (опціонально, потребує httpx[http2])
+try:
+    import httpx
+except ImportError:
+    httpx = None
+# Швидкий event loop (опціонально), див. install_uvloop()
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+# Типізоване декодування конверта комбінованого потоку (опціонально, див. _StreamEnvelope)
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+# On-Demand JSON парсер для кадрів User Data Stream (опціонально, потребує pysimdjson)
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+# Швидкий JSON парсер (опціонально), інакше стандартний json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 import time
-import pandas as pd
+import numpy as np
+from operator import itemgetter
+from itertools import islice
 from datetime import datetime, timezone, timedelta
 from urllib.parse import urlencode, urljoin
 from modules.logger import logger # Використовуємо наш основний логер
@@ -28,6 +63,7 @@ class BinanceAPIError(Exception):
     """Спеціальний клас помилок для BinanceAPI."""
     def __init__(self, status_code, error_data):
         self.status_code = status_code
+        self.error_data = error_data
         error_code = None
         error_msg = None
         if isinstance(error_data, dict):
@@ -45,6 +81,222 @@ class BinanceAPIError(Exception):
         # Формуємо повідомлення для батьківського класу Exception
         message = f"Binance API Error: Status={status_code}, Code={self.code}, Msg='{self.msg}'"
         super().__init__(message)
+
+
+class _NoDelayTCPConnector(aiohttp.TCPConnector):
+    """
+    TCPConnector, що явно вмикає TCP_NODELAY для кожного нового з'єднання.
+    Підписані POST запити (ордери) малі, тому алгоритм Nagle лише додає затримку.
+    """
+    async def _wrap_create_connection(self, *args, **kwargs):
+        transport, protocol = await super()._wrap_create_connection(*args, **kwargs)
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError as e:
+                logger.debug(f"AsyncBinanceAPI: Не вдалося встановити TCP_NODELAY: {e}")
+        return transport, protocol
+
+
+class _WeightLimiter:
+    """
+    Адаптивне обмеження частоти запитів за вагою Binance.
+    Використана вага оновлюється із заголовка X-MBX-USED-WEIGHT-1M відповіді;
+    acquire() блокує лише тоді, коли вага наближається до ліміту хвилинного вікна.
+    """
+    def __init__(self, max_weight: int = 1200, window: float = 60.0, threshold: float = 0.9):
+        self.max_weight = max_weight
+        self.window = window
+        self.threshold = threshold
+        self._used_weight = 0
+        self._window_id = int(time.time() // window)
+        self._lock = asyncio.Lock()
+
+    def _roll_window(self):
+        """Скидає використану вагу, якщо почалось нове вікно (Binance рахує вагу по хвилинах)."""
+        window_id = int(time.time() // self.window)
+        if window_id != self._window_id:
+            self._window_id = window_id
+            self._used_weight = 0
+
+    def update(self, used_weight: int):
+        """Оновлює використану вагу значенням від сервера."""
+        self._roll_window()
+        self._used_weight = used_weight
+
+    async def acquire(self, cost: int = 1):
+        """Чекає до наступного вікна, якщо запит з вагою cost перевищить поріг ліміту."""
+        async with self._lock:
+            self._roll_window()
+            if self._used_weight + cost > self.max_weight * self.threshold:
+                wait_time = self.window - (time.time() % self.window)
+                logger.warning(f"AsyncBinanceAPI: Використана вага {self._used_weight}/{self.max_weight}. Пауза {wait_time:.1f}s до нового вікна.")
+                await asyncio.sleep(wait_time)
+                self._roll_window()
+            # Локальна оцінка до наступного оновлення із заголовка
+            self._used_weight += cost
+
+
+# Помилки таймауту та з'єднання обох HTTP клієнтів
+if httpx is not None:
+    _TIMEOUT_ERRORS = (asyncio.TimeoutError, httpx.TimeoutException)
+    _CLIENT_ERRORS = (aiohttp.ClientError, httpx.HTTPError)
+else:
+    _TIMEOUT_ERRORS = (asyncio.TimeoutError,)
+    _CLIENT_ERRORS = (aiohttp.ClientError,)
+
+# Тривалість інтервалів свічок у мілісекундах ('1M' має змінну тривалість і не включений)
+_INTERVAL_MS = {
+    '1s': 1_000,
+    '1m': 60_000, '3m': 3 * 60_000, '5m': 5 * 60_000, '15m': 15 * 60_000, '30m': 30 * 60_000,
+    '1h': 3_600_000, '2h': 2 * 3_600_000, '4h': 4 * 3_600_000, '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000, '12h': 12 * 3_600_000,
+    '1d': 86_400_000, '3d': 3 * 86_400_000, '1w': 7 * 86_400_000
+}
+
+# Обов'язкові параметри ордерів
+_PLACE_ORDER_REQUIRED = frozenset(('symbol', 'side', 'type'))
+_OCO_ORDER_REQUIRED = frozenset(('symbol', 'side', 'quantity', 'price', 'stopPrice'))
+
+# Десяткове число без експоненти (формат, який приймає API)
+_DECIMAL_RE = re.compile(r'-?[0-9]+(?:\.[0-9]+)?')
+
+# Параметри запиту, що не потрапляють у лог (підпис, ключ, ID ордерів)
+_LOG_REDACTED_PARAMS = frozenset(('signature', 'apiKey', 'newClientOrderId', 'listClientOrderId',
+                                  'stopClientOrderId', 'limitClientOrderId'))
+
+# Числові параметри ордерів, які конвертуються в рядки для API
+_ORDER_NUMERIC_KEYS = frozenset(('quantity', 'quoteOrderQty', 'price', 'stopPrice'))
+_OCO_NUMERIC_KEYS = frozenset(('quantity', 'price', 'stopPrice', 'stopLimitPrice'))
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def to_decimal(value) -> Decimal:
+    """
+    Конвертує число від Binance або з конфігу (рядок, int, float, Decimal) у Decimal.
+    Результати кешуються: рядки на кшталт '0.00000000' та рівні цін повторюються.
+    float конвертується через repr (найкоротше точне представлення, як str).
+    Некоректне значення генерує InvalidOperation.
+    """
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(float(value)))
+    if isinstance(value, (str, int)):
+        return Decimal(value)
+    return Decimal(str(value))
+
+
+# Кеш upper-case форм символів/сторін/типів ордерів (невеликий набір значень)
+_UPPER_CACHE: Dict[str, str] = {}
+_UPPER_CACHE_MAX_SIZE = 1024
+
+
+def _up(value: str) -> str:
+    """Повертає value.upper(), кешуючи результат для повторюваних рядків."""
+    result = _UPPER_CACHE.get(value)
+    if result is None:
+        result = value.upper()
+        if len(_UPPER_CACHE) < _UPPER_CACHE_MAX_SIZE:
+            _UPPER_CACHE[value] = result
+    return result
+
+
+@functools.lru_cache(maxsize=4096)
+def _fmt_decimal(value: str) -> str:
+    """Форматує число (рядок) у фіксовану нотацію для API. Кешується для повторюваних рівнів цін/кількостей."""
+    return format(Decimal(value), 'f')
+
+
+@functools.lru_cache(maxsize=4096)
+def _fmt_quote(value: str) -> str:
+    """Нормалізує quoteOrderQty через Decimal без примусової фіксованої нотації."""
+    return str(Decimal(value))
+
+
+def install_uvloop() -> bool:
+    """
+    Встановлює політику event loop uvloop, якщо бібліотека доступна.
+    Викликати в точці входу процесу до створення циклу (asyncio.run / new_event_loop).
+    Повертає True, якщо uvloop встановлено.
+    """
+    if uvloop is None:
+        logger.info("uvloop не встановлено, використовується стандартний event loop asyncio.")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Встановлено політику event loop uvloop.")
+    return True
+
+
+if msgspec is not None:
+    class _StreamEnvelope(msgspec.Struct):
+        """Конверт комбінованого потоку {"stream": ..., "data": ...}, декодується msgspec без проміжного dict."""
+        stream: str
+        data: Any
+
+    _decode_stream_envelope = msgspec.json.Decoder(_StreamEnvelope).decode
+else:
+    _decode_stream_envelope = None
+
+
+# Початок кадрів Binance (компактний JSON, ключ 'stream' завжди перший): за ним обирається єдиний декодер кадру,
+# щоб кадр не розбирався двічі (невдала спроба типізованого декодера + загальний розбір)
+_STREAM_FRAME_HEADS = frozenset({'{"stream":', b'{"stream":'})
+
+# Типи подій User Data Stream (поле 'e' кадру)
+_EXECUTION_REPORT = 'executionReport'
+_OUTBOUND_ACCOUNT_POSITION = 'outboundAccountPosition'
+_BALANCE_UPDATE = 'balanceUpdate'
+
+if simdjson is not None:
+    # Один парсер на процес: буфери simdjson перевикористовуються між кадрами (обробка кадрів послідовна).
+    # Буфер росте до найбільшого кадру й не зменшується - обмежуємо його 4 МБ (кадри Binance значно менші)
+    _SIMDJSON_PARSER = simdjson.Parser(max_capacity=4 * 1024 * 1024)
+
+    def _loads_ws_frame(message_text: Union[str, bytes]) -> Any:
+        """
+        Розбирає кадр WebSocket через simdjson і повертає повний об'єкт (як _json_loads).
+        Проксі simdjson не виходять за межі функції (парсер не можна перевикористати, поки вони існують).
+        """
+        doc = _SIMDJSON_PARSER.parse(message_text)
+        if isinstance(doc, simdjson.Object):
+            return doc.as_dict()
+        if isinstance(doc, simdjson.Array):
+            return doc.as_list()
+        return doc
+else:
+    _loads_ws_frame = _json_loads
+
+
+# aiohttp >= 3.14: ws_connect(decode_text=False) віддає TEXT кадри як bytes без декодування та перевірки UTF-8
+# (парсери JSON приймають bytes напряму); на старіших версіях параметр не передається
+_WS_CONNECT_TEXT_OPTIONS: Dict[str, Any] = (
+    {'decode_text': False} if 'decode_text' in inspect.signature(aiohttp.ClientSession.ws_connect).parameters else {}
+)
+
+# Типи повідомлень WebSocket, що означають кінець з'єднання
+_WS_CLOSE_TYPES = frozenset({WSMsgType.CLOSE, WSMsgType.CLOSING, WSMsgType.CLOSED, WSMsgType.ERROR})
+
+
+# Колонки рядка Klines від Binance (останнє поле 'ignore' не використовується)
+_KLINE_COLUMNS = (
+    ('timestamp', np.int64), ('open', np.float64), ('high', np.float64),
+    ('low', np.float64), ('close', np.float64), ('volume', np.float64),
+    ('close_time', np.int64), ('quote_asset_volume', np.float64), ('num_trades', np.int64),
+    ('taker_base_vol', np.float64), ('taker_quote_vol', np.float64),
+)
+
+
+def klines_to_columns(klines: List[List[Any]]) -> Dict[str, np.ndarray]:
+    """
+    Перетворює список рядків Klines у колонковий формат: {назва: np.ndarray}.
+    Ціни та об'єми - float64, час та кількість угод - int64.
+    """
+    if not klines:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in _KLINE_COLUMNS}
+    columns = list(zip(*klines))
+    return {name: np.array(columns[i], dtype=dtype) for i, (name, dtype) in enumerate(_KLINE_COLUMNS)}
 # END BLOCK 1
 
 # BLOCK 2: Async BinanceAPI Class Definition - __init__ and Constants
@@ -60,8 +312,23 @@ class BinanceAPI:
     LISTEN_KEY_KEEP_ALIVE_INTERVAL = 30 * 60
     # Таймаут за замовчуванням для API запитів
     REQUEST_TIMEOUT = 10 # Секунди
-
-    def __init__(self, api_key: str | None = None, api_secret: str | None = None, use_testnet: bool = False):
+    # Параметри пулу з'єднань спільної сесії (keep-alive амортизує TLS handshake)
+    CONNECTION_POOL_LIMIT = 64
+    CONNECTION_POOL_LIMIT_PER_HOST = 32
+    DNS_CACHE_TTL = 300 # Секунди
+    KEEPALIVE_TIMEOUT = 75 # Секунди
+    # Ліміт ваги запитів за хвилину (консервативне значення для Spot API)
+    REQUEST_WEIGHT_LIMIT_1M = 1200
+    # Максимальна кількість паралельних запитів при завантаженні історії Klines
+    MAX_KLINE_FETCH_CONCURRENCY = 8
+    MAX_PARALLEL_CANCELS = 5 # Одночасних DELETE /order у cancel_all_orders_parallel
+    # Пакетна відправка ордерів: максимум ордерів у пакеті та вікно очікування під час сплеску
+    ORDER_BATCH_MAX_SIZE = 10
+    ORDER_BATCH_MAX_WAIT = 0.005 # Секунди
+    # Максимум ордерів, що одночасно очікують відповіді; понад це - відмова (-1003)
+    MAX_ORDERS_IN_FLIGHT = 64
+
+    def __init__(self, api_key: str | None = None, api_secret: str | None = None, use_testnet: bool = False, use_http2: bool = False):
         """
         Ініціалізація АСИНХРОННОГО API клієнта.
         Створення сесії aiohttp та синхронізація часу перенесено в async метод initialize().
@@ -70,8 +337,10 @@ class BinanceAPI:
             api_key (str, optional): Ключ API. Якщо None, береться з змінної середовища.
             api_secret (str, optional): Секретний ключ API. Якщо None, береться з змінної середовища.
             use_testnet (bool): Прапорець використання TestNet API.
+            use_http2 (bool): Надсилати підписані запити через HTTP/2 клієнт httpx (якщо встановлено httpx[http2]).
         """
         self.use_testnet = use_testnet
+        self.use_http2 = use_http2
         # Визначаємо ключі та базові URL залежно від режиму
         if use_testnet:
             self.api_key = api_key or os.environ.get('BINANCE_TESTNET_API_KEY')
@@ -92,13 +361,33 @@ class BinanceAPI:
         if not self.api_key or not self.api_secret:
             logger.warning(f"AsyncBinanceAPI({log_mode}): Ключі API не надано/не знайдено. Доступ лише до публічних ендпоінтів.")
 
+        # Шаблон HMAC з уже підготовленими ipad/opad; для кожного підпису береться .copy()
+        self._hmac_template = (
+            hmac.new(self.api_secret.encode('utf-8'), digestmod=hashlib.sha256)
+            if self.api_secret else None
+        )
+
         # Формуємо повні URL для різних версій API
         self.api_v3_url = urljoin(self.base_url, "/api/v3/")
         self.sapi_v1_url = urljoin(self.base_url, "/sapi/v1/")
+        # Таблиця базових URL та кеш повних URL ендпоінтів (не перебудовуються на кожен запит)
+        self._url_base_map = {
+            'api_v3': self.api_v3_url,
+            'sapi_v1': self.sapi_v1_url
+        }
+        self._url_cache: Dict[tuple, str] = {}
+        # (listenKey, закодований query string) для keep-alive User Data Stream
+        self._keepalive_query: Optional[tuple] = None
+        # Спеціалізовані виклики для підписаних запитів (метод та підпис зафіксовані)
+        self._get_signed = functools.partial(self._send_request, 'GET', signed=True)
+        self._post_signed = functools.partial(self._send_request, 'POST', signed=True)
+        self._delete_signed = functools.partial(self._send_request, 'DELETE', signed=True)
 
         # --- ЗМІНА: Сесія aiohttp створюється в initialize() ---
         self.session: aiohttp.ClientSession | None = None
         # --- КІНЕЦЬ ЗМІНИ ---
+        # HTTP/2 клієнт для підписаних запитів (створюється в initialize(), якщо use_http2)
+        self._http = None
 
         # Змінна для зберігання зсуву часу сервера відносно локального
         self._server_time_offset = 0
@@ -106,6 +395,15 @@ class BinanceAPI:
         self._initialized: bool = False
         # Асинхронне блокування для ініціалізації/закриття
         self._init_lock = asyncio.Lock()
+        # Черга ордерів та фонова задача їх пакетної відправки (створюються в initialize())
+        self._order_queue: asyncio.Queue | None = None
+        self._order_submitter_task: asyncio.Task | None = None
+        # Задачі відправки пакетів (по символу), що зараз виконуються
+        self._order_send_tasks: set[asyncio.Task] = set()
+        # Кількість ордерів, що зараз очікують відповіді (backpressure у _submit_order)
+        self._orders_in_flight = 0
+        # Обмеження ваги запитів (оновлюється із заголовків відповідей у _send_request)
+        self._weight_limiter = _WeightLimiter(max_weight=self.REQUEST_WEIGHT_LIMIT_1M)
 
     # Наступні методи будуть додані в наступних блоках...
 
@@ -130,8 +428,15 @@ class BinanceAPI:
             try:
                 # Створюємо таймаут для сесії
                 timeout = ClientTimeout(total=self.REQUEST_TIMEOUT)
-                # Створюємо сесію aiohttp
-                self.session = aiohttp.ClientSession(timeout=timeout)
+                # Створюємо спільну сесію aiohttp для всіх запитів (з'єднання з TCP_NODELAY)
+                connector = _NoDelayTCPConnector(
+                    limit=self.CONNECTION_POOL_LIMIT,
+                    limit_per_host=self.CONNECTION_POOL_LIMIT_PER_HOST,
+                    ttl_dns_cache=self.DNS_CACHE_TTL,
+                    keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+                    enable_cleanup_closed=True
+                )
+                self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
                 logger.info("AsyncBinanceAPI: Сесію aiohttp створено.")
 
                 # Налаштовуємо стандартні заголовки
@@ -144,11 +449,18 @@ class BinanceAPI:
                 if self.api_key:
                     self.session.headers['X-MBX-APIKEY'] = self.api_key
 
+                # Створюємо HTTP/2 клієнт для підписаних запитів (за потреби)
+                if self.use_http2:
+                    self._http = self._create_http2_client(dict(self.session.headers))
+
                 # Виконуємо початкову синхронізацію часу
                 await self._sync_time() # Викликаємо асинхронний внутрішній метод
 
                 # Встановлюємо прапорець успішної ініціалізації
                 self._initialized = True
+                # Запускаємо фонову задачу пакетної відправки ордерів
+                self._order_queue = asyncio.Queue()
+                self._order_submitter_task = asyncio.create_task(self._order_submitter_loop(), name="OrderSubmitter")
                 logger.info("AsyncBinanceAPI: Асинхронну ініціалізацію завершено успішно.")
 
             except Exception as e:
@@ -157,10 +469,31 @@ class BinanceAPI:
                 if self.session and not self.session.closed:
                     await self.session.close()
                 self.session = None
+                if self._http is not None:
+                    await self._http.aclose()
+                    self._http = None
                 self._initialized = False
                 # Перекидаємо помилку далі
                 raise BinanceAPIError(500, {'code': -1001, 'msg': f'Initialization failed: {e}'}) from e
 
+    def _create_http2_client(self, headers: Dict[str, str]):
+        """Створює httpx.AsyncClient з HTTP/2 або повертає None, якщо httpx/h2 недоступні."""
+        if httpx is None:
+            logger.warning("AsyncBinanceAPI: httpx не встановлено, HTTP/2 вимкнено (використовується aiohttp).")
+            return None
+        try:
+            client = httpx.AsyncClient(
+                http2=True,
+                headers=headers,
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+                timeout=self.REQUEST_TIMEOUT
+            )
+        except ImportError:
+            logger.warning("AsyncBinanceAPI: Пакет h2 не встановлено, HTTP/2 вимкнено (використовується aiohttp).")
+            return None
+        logger.info("AsyncBinanceAPI: HTTP/2 клієнт для підписаних запитів створено.")
+        return client
+
     async def _sync_time(self):
         """
         Внутрішній асинхронний метод для синхронізації часу сервера.
@@ -203,6 +536,11 @@ class BinanceAPI:
     async def close(self):
         """Асинхронно закриває сесію aiohttp."""
         async with self._init_lock: # Використовуємо той самий лок, що й для ініціалізації
+            await self._stop_order_submitter()
+            if self._http is not None:
+                await self._http.aclose()
+                self._http = None
+                logger.info("AsyncBinanceAPI: HTTP/2 клієнт закрито.")
             if self.session and not self.session.closed:
                 logger.info("AsyncBinanceAPI: Закриття сесії aiohttp...")
                 await self.session.close()
@@ -217,14 +555,22 @@ class BinanceAPI:
                 logger.debug("AsyncBinanceAPI: Сесія не була створена, закривати нічого.")
                 self._initialized = False # Скидаємо на випадок, якщо ініціалізація не вдалася
 
+    async def __aenter__(self) -> 'BinanceAPI':
+        """Дозволяє використовувати API як `async with BinanceAPI(...) as api:`."""
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
     # Наступні методи...
 # END BLOCK 3
 
 # BLOCK 4: Signature and Timestamp Helper Methods
     def _generate_signature(self, data: dict) -> str:
         """Генерує HMAC-SHA256 підпис для запиту (синхронний метод)."""
-        secret = self.api_secret
-        if not secret:
+        hmac_template = self._hmac_template
+        if hmac_template is None:
             signature_error = ValueError("API Secret не встановлено для генерації підпису.")
             # Логуємо помилку перед генерацією винятку
             logger.error(signature_error)
@@ -233,12 +579,9 @@ class BinanceAPI:
         # Фільтруємо None значення перед кодуванням
         filtered_data = {k: v for k, v in data.items() if v is not None}
         query_string = urlencode(filtered_data)
-        signature = hmac.new(
-            secret.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
+        signer = hmac_template.copy()
+        signer.update(query_string.encode('utf-8'))
+        return signer.hexdigest()
 
     def _get_timestamp(self) -> int:
         """Повертає поточний час UTC в мілісекундах, скоригований на зсув сервера (синхронний метод)."""
@@ -265,7 +608,7 @@ class BinanceAPI:
                            method: str,
                            endpoint_path: str,
                            base_url_type: str = 'api_v3',
-                           params: Optional[Dict[str, Any]] = None,
+                           params: Optional[Union[Dict[str, Any], str]] = None,
                            signed: bool = False,
                            is_user_stream: bool = False,
                            timeout: int | None = None # Дозволяємо None для використання таймауту сесії
@@ -280,8 +623,11 @@ class BinanceAPI:
              logger.error(err_msg)
              raise BinanceAPIError(500, {'code': -1002, 'msg': err_msg})
 
-        # Ініціалізуємо параметри
-        request_params = params.copy() if params else {}
+        # Ініціалізуємо параметри (рядок - вже закодований query string User Stream)
+        if isinstance(params, str):
+            request_params = params
+        else:
+            request_params = params.copy() if params else {}
 
         # --- Підготовка підписаних запитів ---
         if signed:
@@ -294,23 +640,23 @@ class BinanceAPI:
                 signature = self._generate_signature(request_params)
                 request_params['signature'] = signature
 
-        # --- Визначення URL ---
-        url_base_map = {
-            'api_v3': self.api_v3_url,
-            'sapi_v1': self.sapi_v1_url
-        }
+        # --- Визначення URL (з кешу) ---
         # User Stream використовує api_v3_url
-        url_base = self.api_v3_url if is_user_stream else url_base_map.get(base_url_type)
-        if not url_base:
-            logger.error(f"Невідомий тип базового URL: {base_url_type}")
-            raise ValueError(f"Invalid base_url_type: {base_url_type}")
-
-        endpoint_cleaned = endpoint_path.lstrip('/')
-        url = urljoin(url_base, endpoint_cleaned)
+        url_key = ('api_v3' if is_user_stream else base_url_type, endpoint_path)
+        url = self._url_cache.get(url_key)
+        if url is None:
+            url_base = self._url_base_map.get(url_key[0])
+            if not url_base:
+                logger.error(f"Невідомий тип базового URL: {base_url_type}")
+                raise ValueError(f"Invalid base_url_type: {base_url_type}")
+
+            endpoint_cleaned = endpoint_path.lstrip('/')
+            url = urljoin(url_base, endpoint_cleaned)
+            self._url_cache[url_key] = url
 
         # --- Розподіл параметрів: query string vs data payload ---
         http_method = method.upper()
-        query_string_params: Optional[Dict[str, Any]] = None
+        query_string_params: Optional[Union[Dict[str, Any], str]] = None
         data_payload: Optional[Dict[str, Any]] = None
 
         if http_method in ['GET', 'DELETE']:
@@ -331,7 +677,7 @@ class BinanceAPI:
         # Видаляємо чутливі дані з логу
         log_params_safe = {}
         if isinstance(params_for_log_dict, dict):
-             log_params_safe = {k: v for k, v in params_for_log_dict.items() if k not in ['signature', 'apiKey', 'newClientOrderId', 'listClientOrderId', 'stopClientOrderId', 'limitClientOrderId']} # Додано ID ордерів
+             log_params_safe = {k: v for k, v in params_for_log_dict.items() if k not in _LOG_REDACTED_PARAMS}
         params_for_log_str = str(log_params_safe)[:150] if log_params_safe else "{}"
         logger.debug(f"AsyncAPI -> {http_method} {url} | Params(part): {params_for_log_str}...")
 
@@ -341,68 +687,88 @@ class BinanceAPI:
 
         # --- Надсилання запиту та обробка відповіді ---
         try:
-            async with self.session.request(
-                method=http_method,
-                url=url,
-                params=query_string_params, # aiohttp використовує 'params' для query string
-                data=data_payload,         # aiohttp використовує 'data' для тіла POST/PUT
-                # headers=... # Заголовки вже в сесії
-                timeout=request_timeout
-            ) as response:
-                status_code = response.status
-                response_text = await response.text() # Читаємо текст для логів/помилок
-
-                # --- Спроба розпарсити JSON ---
-                try:
-                    # content_type=None робить парсинг стійкішим до Content-Type від Binance
-                    response_data = await response.json(content_type=None)
-                except json.JSONDecodeError:
-                    # Не JSON відповідь
-                    is_success_status = 200 <= status_code < 300
-                    is_empty_body = not response_text
-                    if is_success_status and is_empty_body:
-                        logger.debug(f"AsyncAPI <- {status_code} | OK (Empty Body)")
-                        return {} # Успішна порожня відповідь (напр., DELETE)
-                    else:
-                        log_text_preview = response_text[:200]
-                        logger.error(f"AsyncAPI <- {status_code} | Не JSON відповідь: {log_text_preview}...")
-                        if not is_success_status:
-                            # Генеруємо помилку з текстом відповіді
-                            raise BinanceAPIError(status_code, response_text)
-                        else:
-                            # Успішний статус, але не JSON і не порожнє тіло - дивно
-                            return None # Повертаємо None, щоб вказати на проблему
-
-                # --- Обробка JSON відповіді ---
-                if 200 <= status_code < 300:
-                    log_data_preview = str(response_data)[:200]
-                    logger.debug(f"AsyncAPI <- {status_code} | OK | Data(part): {log_data_preview}...")
-                    return response_data # Повертаємо успішну JSON відповідь
+            if signed and self._http is not None:
+                # HTTP/2 клієнт: підписані запити мультиплексуються на одному з'єднанні
+                response = await self._http.request(
+                    http_method,
+                    url,
+                    params=query_string_params,
+                    data=data_payload,
+                    timeout=timeout if timeout is not None else self.REQUEST_TIMEOUT
+                )
+                status_code = response.status_code
+                response_headers = response.headers
+                response_body = response.content
+            else:
+                async with self.session.request(
+                    method=http_method,
+                    url=url,
+                    params=query_string_params, # aiohttp використовує 'params' для query string
+                    data=data_payload,         # aiohttp використовує 'data' для тіла POST/PUT
+                    # headers=... # Заголовки вже в сесії
+                    timeout=request_timeout
+                ) as response:
+                    status_code = response.status
+                    response_headers = response.headers
+                    # Читаємо сирі байти; текст декодується лише для логів/помилок
+                    response_body = await response.read()
+
+            # Оновлюємо використану вагу запитів
+            used_weight = response_headers.get('X-MBX-USED-WEIGHT-1M')
+            if used_weight is not None and used_weight.isdigit():
+                self._weight_limiter.update(int(used_weight))
+
+            # --- Спроба розпарсити JSON (orjson, якщо встановлено) ---
+            try:
+                response_data = _json_loads(response_body)
+            except ValueError: # json.JSONDecodeError та orjson.JSONDecodeError
+                # Не JSON відповідь
+                response_text = response_body.decode('utf-8', errors='replace')
+                is_success_status = 200 <= status_code < 300
+                is_empty_body = not response_text
+                if is_success_status and is_empty_body:
+                    logger.debug(f"AsyncAPI <- {status_code} | OK (Empty Body)")
+                    return {} # Успішна порожня відповідь (напр., DELETE)
                 else:
-                    # Статус код помилки (4xx, 5xx), але є JSON
-                    error_data_dict = response_data if isinstance(response_data, dict) else {}
-                    error_code = error_data_dict.get('code', -1)
-                    error_msg = error_data_dict.get('msg', response_text)
-                    logger.error(f"AsyncAPI <- {status_code} | Помилка API Binance: Code={error_code}, Msg='{error_msg}' | URL={url}")
-
-                    # Обробка помилки timestamp (-1021)
-                    if error_code == -1021:
-                        logger.warning("Помилка Timestamp (-1021). Спроба повторної синхронізації часу...")
-                        try:
-                            await self._sync_time() # Викликаємо асинхронну синхронізацію
-                        except Exception as sync_err:
-                             logger.error(f"Не вдалося повторно синхронізувати час після помилки -1021: {sync_err}")
-                             # Продовжуємо з оригінальною помилкою -1021
-
-                    # Генеруємо виняток BinanceAPIError
-                    raise BinanceAPIError(status_code=status_code, error_data=error_data_dict)
-
-        # --- Обробка помилок рівня aiohttp/asyncio ---
-        except asyncio.TimeoutError:
+                    log_text_preview = response_text[:200]
+                    logger.error(f"AsyncAPI <- {status_code} | Не JSON відповідь: {log_text_preview}...")
+                    if not is_success_status:
+                        # Генеруємо помилку з текстом відповіді
+                        raise BinanceAPIError(status_code, response_text)
+                    else:
+                        # Успішний статус, але не JSON і не порожнє тіло - дивно
+                        return None # Повертаємо None, щоб вказати на проблему
+
+            # --- Обробка JSON відповіді ---
+            if 200 <= status_code < 300:
+                log_data_preview = str(response_data)[:200]
+                logger.debug(f"AsyncAPI <- {status_code} | OK | Data(part): {log_data_preview}...")
+                return response_data # Повертаємо успішну JSON відповідь
+            else:
+                # Статус код помилки (4xx, 5xx), але є JSON
+                error_data_dict = response_data if isinstance(response_data, dict) else {}
+                error_code = error_data_dict.get('code', -1)
+                error_msg = error_data_dict['msg'] if 'msg' in error_data_dict else response_body.decode('utf-8', errors='replace')
+                logger.error(f"AsyncAPI <- {status_code} | Помилка API Binance: Code={error_code}, Msg='{error_msg}' | URL={url}")
+
+                # Обробка помилки timestamp (-1021)
+                if error_code == -1021:
+                    logger.warning("Помилка Timestamp (-1021). Спроба повторної синхронізації часу...")
+                    try:
+                        await self._sync_time() # Викликаємо асинхронну синхронізацію
+                    except Exception as sync_err:
+                         logger.error(f"Не вдалося повторно синхронізувати час після помилки -1021: {sync_err}")
+                         # Продовжуємо з оригінальною помилкою -1021
+
+                # Генеруємо виняток BinanceAPIError
+                raise BinanceAPIError(status_code=status_code, error_data=error_data_dict)
+
+        # --- Обробка помилок рівня aiohttp/httpx/asyncio ---
+        except _TIMEOUT_ERRORS:
             timeout_val = timeout if timeout is not None else self.REQUEST_TIMEOUT
             logger.error(f"AsyncAPI Timeout ({timeout_val}s): {http_method} {url}")
             raise BinanceAPIError(408, {'code':-1008, 'msg':'Request Timeout'}) from None
-        except aiohttp.ClientError as e: # Базовий клас для помилок aiohttp
+        except _CLIENT_ERRORS as e: # Базові класи помилок aiohttp/httpx
             logger.error(f"AsyncAPI ClientError: {e} | {http_method} {url}")
             # Можна деталізувати типи помилок (ClientConnectorError, ClientResponseError etc.)
             raise BinanceAPIError(503, {'code':-1007, 'msg':f'Connection Error: {e}'}) from e
@@ -416,6 +782,119 @@ class BinanceAPI:
 
 # END BLOCK 5
 
+# BLOCK 5.5: Order Submission Queue (Coalescing Submitter)
+    async def _submit_order(self, endpoint_path: str, params: Dict[str, Any]) -> Union[Dict[str, Any], List[Any], None]:
+        """
+        Ставить підписаний POST ордера в чергу фонової задачі та чекає результат.
+        Якщо задача не запущена, надсилає запит напряму.
+        Якщо відповіді очікують вже MAX_ORDERS_IN_FLIGHT ордерів, одразу генерує BinanceAPIError(-1003).
+        """
+        if self._orders_in_flight >= self.MAX_ORDERS_IN_FLIGHT:
+            raise BinanceAPIError(429, {'code': -1003, 'msg': f'Local backpressure: {self._orders_in_flight} orders in flight'})
+
+        self._orders_in_flight += 1
+        try:
+            order_queue = self._order_queue
+            task = self._order_submitter_task
+            if order_queue is None or task is None or task.done():
+                return await self._post_signed(endpoint_path, params=params)
+
+            future = asyncio.get_running_loop().create_future()
+            order_queue.put_nowait((endpoint_path, params, future))
+            return await future
+        finally:
+            self._orders_in_flight -= 1
+
+    async def _order_submitter_loop(self):
+        """
+        Фонова задача, що збирає ордери з черги, групує їх за символом і запускає
+        відправку кожної групи окремою задачею (не чекаючи відповіді - черга читається далі).
+        Одиночний ордер відправляється одразу; вікно ORDER_BATCH_MAX_WAIT застосовується
+        лише під час сплеску (коли в черзі вже є наступні ордери).
+        """
+        order_queue = self._order_queue
+        loop = asyncio.get_running_loop()
+        logger.debug("AsyncBinanceAPI: Задача пакетної відправки ордерів запущена.")
+        try:
+            while True:
+                batch = [await order_queue.get()]
+                # Забираємо все, що вже чекає в черзі
+                while len(batch) < self.ORDER_BATCH_MAX_SIZE and not order_queue.empty():
+                    batch.append(order_queue.get_nowait())
+                # Сплеск ордерів: коротко чекаємо на решту
+                if len(batch) > 1:
+                    deadline = loop.time() + self.ORDER_BATCH_MAX_WAIT
+                    while len(batch) < self.ORDER_BATCH_MAX_SIZE:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(order_queue.get(), timeout=remaining))
+                        except asyncio.TimeoutError:
+                            break
+
+                # Групуємо за символом: кожна група - окрема задача відправки
+                batch_by_symbol: Dict[Any, list] = {}
+                for entry in batch:
+                    batch_by_symbol.setdefault(entry[1].get('symbol'), []).append(entry)
+                if len(batch) > 1:
+                    logger.debug(f"AsyncBinanceAPI: Відправка пакету з {len(batch)} ордерів ({len(batch_by_symbol)} символів).")
+                for symbol, symbol_batch in batch_by_symbol.items():
+                    send_task = asyncio.create_task(self._send_order_batch(symbol_batch), name=f"OrderSend-{symbol}")
+                    self._order_send_tasks.add(send_task)
+                    send_task.add_done_callback(self._order_send_tasks.discard)
+        except asyncio.CancelledError:
+            logger.debug("AsyncBinanceAPI: Задача пакетної відправки ордерів скасована.")
+            raise
+
+    async def _send_order_batch(self, batch: list):
+        """Надсилає групу ордерів одного символу через asyncio.gather та виставляє результати у їх future."""
+        try:
+            results = await asyncio.gather(
+                *[self._post_signed(endpoint_path, params=params)
+                  for endpoint_path, params, _ in batch],
+                return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(BinanceAPIError(500, {'code': -1002, 'msg': 'API closed before order response was received'}))
+            raise
+        for (_, _, future), result in zip(batch, results):
+            if future.done(): # Викликач міг скасувати очікування
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _stop_order_submitter(self):
+        """Зупиняє задачу пакетної відправки, скасовує відправки в процесі та завершує з помилкою ордери, що залишились у черзі."""
+        task = self._order_submitter_task
+        order_queue = self._order_queue
+        self._order_submitter_task = None
+        self._order_queue = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Скасовуємо відправки, що ще чекають відповіді (їх future завершуються з помилкою)
+        send_tasks = list(self._order_send_tasks)
+        self._order_send_tasks.clear()
+        for send_task in send_tasks:
+            send_task.cancel()
+        if send_tasks:
+            await asyncio.gather(*send_tasks, return_exceptions=True)
+        if order_queue is not None:
+            while not order_queue.empty():
+                _, _, future = order_queue.get_nowait()
+                if not future.done():
+                    future.set_exception(BinanceAPIError(500, {'code': -1002, 'msg': 'API closed before order was sent'}))
+
+# END BLOCK 5.5
+
 # BLOCK 6: Public Async Methods (Market Data)
     async def get_server_time(self) -> int | None:
         """Асинхронно отримує поточний час сервера Binance в мілісекундах UTC."""
@@ -442,7 +921,7 @@ class BinanceAPI:
         """
         params: Dict[str, Any] = {}
         if symbol:
-            params['symbol'] = symbol.upper()
+            params['symbol'] = _up(symbol)
         elif symbols:
              # Переконуємось, що передано список рядків
              if isinstance(symbols, list) and all(isinstance(s, str) for s in symbols):
@@ -495,7 +974,7 @@ class BinanceAPI:
 
     async def get_current_price(self, symbol: str) -> Optional[Decimal]:
         """Асинхронно отримує поточну ціну для вказаного символу."""
-        params = {'symbol': symbol.upper()}
+        params = {'symbol': _up(symbol)}
         try:
             response = await self._send_request(
                 method='GET',
@@ -505,9 +984,8 @@ class BinanceAPI:
             if isinstance(response, dict) and 'price' in response:
                 price_str = response['price']
                 try:
-                    price_decimal = Decimal(price_str)
-                    return price_decimal
-                except InvalidOperation:
+                    return to_decimal(price_str)
+                except (InvalidOperation, TypeError, ValueError):
                     logger.error(f"get_current_price: Не вдалося конвертувати ціну '{price_str}' для {symbol} у Decimal.")
                     return None
             else:
@@ -534,6 +1012,8 @@ class BinanceAPI:
         """
         Асинхронно отримує історичні дані Klines (свічки).
         Автоматично обробляє пагінацію для завантаження великих періодів.
+        Якщо відомі початок і кінець періоду, він ділиться на підперіоди,
+        які завантажуються паралельно (до MAX_KLINE_FETCH_CONCURRENCY).
 
         Args:
             symbol (str): Символ (напр., 'BTCUSDT').
@@ -547,8 +1027,6 @@ class BinanceAPI:
         """
         symbol_upper = symbol.upper()
         request_limit = min(limit, self.MAX_KLINE_LIMIT)
-        all_klines: List[List[Any]] = []
-        current_start_ts = start_ts
 
         # Визначаємо кінцевий timestamp, якщо не вказано (поточний час)
         # Використовуємо _get_timestamp для врахування зсуву
@@ -562,10 +1040,111 @@ class BinanceAPI:
             logger.warning(f"get_historical_klines: start_ts ({start_ts}) >= end_ts ({end_ts_final}). Даних не буде.")
             return [] # Повертаємо порожній список
 
-        log_start_dt_str = str(start_ts)
-        if start_ts: log_start_dt_str = pd.to_datetime(start_ts, unit='ms', utc=True).strftime('%Y-%m-%d %H:%M')
-        log_end_dt_str = pd.to_datetime(end_ts_final, unit='ms', utc=True).strftime('%Y-%m-%d %H:%M')
-        logger.info(f"Завантаження Klines: {symbol_upper}({interval}) | Start:{log_start_dt_str}| End:{log_end_dt_str}| LimitPerReq:{request_limit}")
+        if logger.isEnabledFor(logging.INFO):
+            log_start_dt_str = str(start_ts)
+            if start_ts: log_start_dt_str = datetime.fromtimestamp(start_ts / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+            log_end_dt_str = datetime.fromtimestamp(end_ts_final / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+            logger.info(f"Завантаження Klines: {symbol_upper}({interval}) | Start:{log_start_dt_str}| End:{log_end_dt_str}| LimitPerReq:{request_limit}")
+
+        # --- Розбиття періоду на підперіоди для паралельного завантаження ---
+        ranges = self._split_klines_range(start_ts, end_ts_final, interval, request_limit)
+        if len(ranges) == 1:
+            range_results = [await self._fetch_klines_range(symbol_upper, interval, ranges[0][0], ranges[0][1], request_limit)]
+        else:
+            logger.debug(f"get_historical_klines: Паралельне завантаження {len(ranges)} підперіодів.")
+            range_results = await asyncio.gather(
+                *[self._fetch_klines_range(symbol_upper, interval, range_start, range_end, request_limit)
+                  for range_start, range_end in ranges]
+            )
+        if any(result is None for result in range_results):
+            return None # Помилка вже залогована в _fetch_klines_range
+
+        # --- Об'єднання ---
+        # Підперіоди не перетинаються та йдуть по черзі, тому конкатенація вже відсортована.
+        all_klines: List[List[Any]] = []
+        duplicates_count = 0
+        last_ts = -1
+        for range_klines, range_duplicates in range_results:
+            duplicates_count += range_duplicates
+            if not range_klines:
+                continue
+            if range_klines[0][0] <= last_ts:
+                new_klines = [k for k in range_klines if k[0] > last_ts]
+                duplicates_count += len(range_klines) - len(new_klines)
+                range_klines = new_klines
+                if not range_klines:
+                    continue
+            all_klines.extend(range_klines)
+            last_ts = range_klines[-1][0]
+
+        # --- Завершення ---
+        final_kline_count = len(all_klines)
+        logger.info(f"Завантаження Klines завершено. Загальна кількість свічок: {final_kline_count}.")
+        # Дублікати вже відсіяно під час пагінації
+        if duplicates_count > 0:
+             logger.warning(f"get_historical_klines: Видалено {duplicates_count} дублікатів свічок.")
+        return all_klines
+
+    async def get_historical_klines_columnar(self,
+                                             symbol: str,
+                                             interval: str,
+                                             start_ts: Optional[int] = None,
+                                             end_ts: Optional[int] = None,
+                                             limit: int = 1000
+                                            ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Як get_historical_klines, але повертає колонки numpy (див. klines_to_columns)
+        для векторних обчислень над ціною/об'ємом.
+        """
+        klines = await self.get_historical_klines(symbol, interval, start_ts, end_ts, limit)
+        if klines is None:
+            return None
+        return klines_to_columns(klines)
+
+    def _split_klines_range(self, start_ts: Optional[int], end_ts: int, interval: str, request_limit: int) -> List[tuple]:
+        """
+        Ділить період [start_ts, end_ts] на підперіоди, вирівняні по інтервалу свічки.
+        Повертає один період, якщо start_ts не вказано, інтервал невідомий або вистачає однієї сторінки.
+        """
+        interval_ms = _INTERVAL_MS.get(interval)
+        if start_ts is None or not interval_ms:
+            return [(start_ts, end_ts)]
+
+        expected_count = (end_ts - start_ts) // interval_ms + 1
+        pages_count = -(-expected_count // request_limit) # Ділення з округленням вгору
+        parts = min(self.MAX_KLINE_FETCH_CONCURRENCY, pages_count)
+        if parts <= 1:
+            return [(start_ts, end_ts)]
+
+        chunk_ms = -(-expected_count // parts) * interval_ms
+        ranges = []
+        range_start = start_ts
+        while range_start <= end_ts:
+            range_end = min(range_start + chunk_ms - 1, end_ts)
+            ranges.append((range_start, range_end))
+            range_start += chunk_ms
+        return ranges
+
+    async def _fetch_klines_range(self,
+                                  symbol_upper: str,
+                                  interval: str,
+                                  start_ts: Optional[int],
+                                  end_ts: int,
+                                  request_limit: int
+                                 ) -> Optional[tuple]:
+        """
+        Послідовно завантажує свічки одного періоду з пагінацією.
+        Якщо start_ts не вказано, завантажує лише останні request_limit свічок.
+
+        Returns:
+            tuple or None: (список свічок, кількість відкинутих дублікатів) або None у разі помилки.
+        """
+        range_klines: List[List[Any]] = []
+        current_start_ts = start_ts
+        interval_ms = _INTERVAL_MS.get(interval)
+        # Open time останньої доданої свічки (для відсіювання дублікатів на межах batch)
+        last_ts = -1
+        duplicates_count = 0
 
         # --- Цикл пагінації ---
         while True:
@@ -577,14 +1156,14 @@ class BinanceAPI:
             if current_start_ts:
                 params['startTime'] = current_start_ts
             # Додаємо endTime, якщо він є і період ще не завершено
-            if end_ts_final:
+            if end_ts:
                  # Перевіряємо, чи наступний startTime не перевищить endTime
-                 if current_start_ts and current_start_ts > end_ts_final:
+                 if current_start_ts and current_start_ts > end_ts:
                       logger.debug("get_historical_klines: Наступний startTime перевищує endTime, завершення пагінації.")
                       break
-                 params['endTime'] = end_ts_final # Включаємо кінцевий час
+                 params['endTime'] = end_ts # Включаємо кінцевий час
 
-            logger.debug(f"API Запит klines batch: {params}")
+            logger.debug("API Запит klines batch: %s", params)
 
             try:
                 # Надсилаємо асинхронний запит
@@ -608,9 +1187,23 @@ class BinanceAPI:
                     logger.debug("get_historical_klines: Отримано порожній batch, завершення пагінації.")
                     break # Виходимо з циклу, якщо даних більше немає
 
-                # Додаємо отримані свічки до загального списку
-                all_klines.extend(klines_batch)
-                logger.debug(f"get_historical_klines: Завантажено batch {len(klines_batch)} свічок. Всього: {len(all_klines)}")
+                # Дедуплікація нижче покладається на порядок за open time. API повертає batch відсортованим,
+                # тому перевіряємо кожну сусідню пару і сортуємо лише batch, що порушує порядок.
+                if any(prev_kline[0] > kline[0] for prev_kline, kline in zip(klines_batch, islice(klines_batch, 1, None))):
+                    logger.warning("get_historical_klines: Отримано невідсортований batch, сортування.")
+                    klines_batch.sort(key=itemgetter(0))
+
+                # Додаємо отримані свічки до загального списку.
+                # Batch-і йдуть по черзі, тому дублікати можуть бути лише на початку batch (ts <= last_ts).
+                if klines_batch[0][0] > last_ts:
+                    range_klines.extend(klines_batch)
+                else:
+                    new_klines = [k for k in klines_batch if k[0] > last_ts]
+                    duplicates_count += len(klines_batch) - len(new_klines)
+                    range_klines.extend(new_klines)
+                if range_klines:
+                    last_ts = range_klines[-1][0]
+                logger.debug("get_historical_klines: Завантажено batch %d свічок. Всього: %d", len(klines_batch), len(range_klines))
 
                 # --- Логіка для наступної ітерації ---
                 if start_ts is None: # Якщо завантажували тільки останні 'limit'
@@ -620,18 +1213,19 @@ class BinanceAPI:
                 # Індекси Klines: 0 - Open time, 6 - Close time
                 last_kline_time_ms = klines_batch[-1][0]
 
-                # Перевіряємо умови виходу
-                reached_end_time = last_kline_time_ms >= end_ts_final
+                # Перевіряємо умови виходу (наступна свічка вже була б поза періодом)
+                reached_end_time = last_kline_time_ms >= end_ts or \
+                                   (interval_ms is not None and last_kline_time_ms + interval_ms > end_ts)
                 received_less_than_limit = len(klines_batch) < request_limit
 
                 if reached_end_time or received_less_than_limit:
-                    logger.debug(f"get_historical_klines: Досягнуто кінця періоду або даних ({'end_time' if reached_end_time else 'limit'}).")
+                    logger.debug("get_historical_klines: Досягнуто кінця періоду або даних (%s).", 'end_time' if reached_end_time else 'limit')
                     break
 
                 # Оновлюємо start_ts для наступного запиту
                 current_start_ts = last_kline_time_ms + 1
-                # Асинхронна пауза між запитами
-                await asyncio.sleep(0.12)
+                # Пауза лише при наближенні до ліміту ваги запитів
+                await self._weight_limiter.acquire(cost=1)
 
             except BinanceAPIError as e:
                 logger.error(f"get_historical_klines: Помилка API під час завантаження batch: {e}")
@@ -640,31 +1234,14 @@ class BinanceAPI:
                 logger.error(f"get_historical_klines: Загальна помилка під час завантаження batch: {e}", exc_info=True)
                 return None # Повертаємо None у разі іншої помилки
 
-        # --- Завершення ---
-        final_kline_count = len(all_klines)
-        logger.info(f"Завантаження Klines завершено. Загальна кількість свічок: {final_kline_count}.")
-        # Видаляємо дублікати, якщо вони раптом з'явилися (за timestamp)
-        if final_kline_count > 0:
-             unique_klines_dict = {k[0]: k for k in all_klines}
-             unique_klines = list(unique_klines_dict.values())
-             # Сортуємо за timestamp про всяк випадок
-             unique_klines.sort(key=lambda x: x[0])
-             if len(unique_klines) < final_kline_count:
-                  logger.warning(f"get_historical_klines: Видалено {final_kline_count - len(unique_klines)} дублікатів свічок.")
-             return unique_klines
-        else:
-             return all_klines # Повертаємо порожній список, якщо нічого не завантажено
+        return range_klines, duplicates_count
 # END BLOCK 7
 
 # BLOCK 8: Public Async Methods (Account and Order Management)
     async def get_account_info(self) -> Optional[Dict[str, Any]]:
         """Асинхронно отримує інформацію про акаунт (баланси, дозволи). Потребує підпису."""
         try:
-            response = await self._send_request(
-                method='GET',
-                endpoint_path='account',
-                signed=True
-            )
+            response = await self._get_signed('account')
             # Перевіряємо чи відповідь є словником
             if isinstance(response, dict):
                  return response
@@ -684,39 +1261,38 @@ class BinanceAPI:
         Приймає параметри ордера як key=value аргументи.
         Числові значення (quantity, price, etc.) мають бути передані як Decimal або рядок.
         """
-        required_params = ['symbol', 'side', 'type']
-        if not all(k in params for k in required_params):
-            logger.error(f"place_order: Відсутні обов'язкові параметри: {required_params}. Отримано: {list(params.keys())}")
+        if not _PLACE_ORDER_REQUIRED <= params.keys():
+            logger.error(f"place_order: Відсутні обов'язкові параметри: {sorted(_PLACE_ORDER_REQUIRED)}. Отримано: {list(params.keys())}")
             return None
 
-        order_params = params.copy()
-        order_params['symbol'] = order_params['symbol'].upper()
-        order_params['side'] = order_params['side'].upper()
-        order_params['type'] = order_params['type'].upper()
+        order_params = {
+            **params,
+            'symbol': _up(params['symbol']),
+            'side': _up(params['side']),
+            'type': _up(params['type'])
+        }
 
         # Конвертуємо Decimal/float/int в рядки для API
-        numeric_keys = ['quantity', 'quoteOrderQty', 'price', 'stopPrice']
-        for key in numeric_keys:
-            if key in order_params and order_params[key] is not None:
-                 # Використовуємо format(Decimal(str(value)), 'f') для універсальності та точності
+        for key in params.keys() & _ORDER_NUMERIC_KEYS:
+            value = order_params[key]
+            # Рядок вже у десятковій нотації - передаємо як є
+            if type(value) is str and _DECIMAL_RE.fullmatch(value):
+                 continue
+            if value is not None:
+                 # Використовуємо format(Decimal(str(value)), 'f') для універсальності та точності (з кешем)
                  try:
-                      decimal_value = Decimal(str(order_params[key]))
                       # Важливо: Не форматувати 'quoteOrderQty' як 'f', якщо не впевнені в точності
                       if key == 'quoteOrderQty':
-                           order_params[key] = str(decimal_value) # Зберігаємо як рядок без фіксованої точки
+                           order_params[key] = _fmt_quote(str(order_params[key])) # Зберігаємо як рядок без фіксованої точки
                       else:
-                           order_params[key] = format(decimal_value, 'f')
+                           order_params[key] = _fmt_decimal(str(order_params[key]))
                  except (InvalidOperation, TypeError, ValueError) as fmt_err:
                        logger.error(f"place_order: Помилка форматування параметра '{key}'='{order_params[key]}': {fmt_err}")
                        return None # Помилка форматування параметра
 
         try:
-            response = await self._send_request(
-                method='POST',
-                endpoint_path='order',
-                params=order_params, # Для POST параметри йдуть в 'data' в _send_request
-                signed=True
-            )
+            # Ордер відправляється через чергу пакетної відправки
+            response = await self._submit_order('order', order_params)
             if isinstance(response, dict):
                 return response
             else:
@@ -726,7 +1302,7 @@ class BinanceAPI:
             logger.error(f"place_order: Помилка API: {e}")
             return None
         except Exception as e:
-            logger.error(f"place_order: Загальна помилка: {e}", exc_info=True)
+            logger.error("place_order: Загальна помилка: %r", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
     async def place_oco_order(self, **params) -> Optional[Dict[str, Any]]:
@@ -734,33 +1310,28 @@ class BinanceAPI:
         Асинхронно розміщує OCO ордер. Потребує підпису.
         Числові значення (quantity, price, etc.) мають бути передані як Decimal або рядок.
         """
-        required_params = ['symbol', 'side', 'quantity', 'price', 'stopPrice']
-        if not all(k in params for k in required_params):
-            logger.error(f"place_oco_order: Відсутні обов'язкові параметри: {required_params}. Отримано: {list(params.keys())}")
+        if not _OCO_ORDER_REQUIRED <= params.keys():
+            logger.error(f"place_oco_order: Відсутні обов'язкові параметри: {sorted(_OCO_ORDER_REQUIRED)}. Отримано: {list(params.keys())}")
             return None
 
-        oco_params = params.copy()
-        oco_params['symbol'] = oco_params['symbol'].upper()
-        oco_params['side'] = oco_params['side'].upper()
+        oco_params = {**params, 'symbol': _up(params['symbol']), 'side': _up(params['side'])}
 
         # Конвертуємо числові значення в рядки
-        numeric_keys = ['quantity', 'price', 'stopPrice', 'stopLimitPrice']
-        for key in numeric_keys:
-            if key in oco_params and oco_params[key] is not None:
+        for key in params.keys() & _OCO_NUMERIC_KEYS:
+            value = oco_params[key]
+            # Рядок вже у десятковій нотації - передаємо як є
+            if type(value) is str and _DECIMAL_RE.fullmatch(value):
+                 continue
+            if value is not None:
                  try:
-                      decimal_value = Decimal(str(oco_params[key]))
-                      oco_params[key] = format(decimal_value, 'f')
+                      oco_params[key] = _fmt_decimal(str(oco_params[key]))
                  except (InvalidOperation, TypeError, ValueError) as fmt_err:
                        logger.error(f"place_oco_order: Помилка форматування параметра '{key}'='{oco_params[key]}': {fmt_err}")
                        return None
 
         try:
-            response = await self._send_request(
-                method='POST',
-                endpoint_path='order/oco',
-                params=oco_params, # Для POST параметри йдуть в 'data' в _send_request
-                signed=True
-            )
+            # Ордер відправляється через чергу пакетної відправки
+            response = await self._submit_order('order/oco', oco_params)
             if isinstance(response, dict):
                 return response
             else:
@@ -770,7 +1341,7 @@ class BinanceAPI:
             logger.error(f"place_oco_order: Помилка API: {e}")
             return None
         except Exception as e:
-            logger.error(f"place_oco_order: Загальна помилка: {e}", exc_info=True)
+            logger.error("place_oco_order: Загальна помилка: %r", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
     async def cancel_order(self, **params) -> Optional[Dict[str, Any]]:
@@ -785,16 +1356,10 @@ class BinanceAPI:
             logger.error("cancel_order: Потрібно вказати 'symbol' та один з 'orderId' або 'origClientOrderId'.")
             return None
 
-        cancel_params = params.copy()
-        cancel_params['symbol'] = cancel_params['symbol'].upper()
+        cancel_params = {**params, 'symbol': _up(params['symbol'])}
 
         try:
-            response = await self._send_request(
-                method='DELETE',
-                endpoint_path='order',
-                params=cancel_params,
-                signed=True
-            )
+            response = await self._delete_signed('order', params=cancel_params)
             if isinstance(response, dict):
                 return response
             else:
@@ -809,7 +1374,7 @@ class BinanceAPI:
                 logger.error(f"cancel_order: Помилка API: {e}")
                 return None
         except Exception as e:
-            logger.error(f"cancel_order: Загальна помилка: {e}", exc_info=True)
+            logger.error("cancel_order: Загальна помилка: %r", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
     async def cancel_all_orders(self, symbol: str) -> Optional[List[Any]]:
@@ -819,14 +1384,9 @@ class BinanceAPI:
         if not symbol:
             logger.error("cancel_all_orders: Потрібно вказати 'symbol'.")
             return None
-        params = {'symbol': symbol.upper()}
+        params = {'symbol': _up(symbol)}
         try:
-            response = await self._send_request(
-                method='DELETE',
-                endpoint_path='openOrders',
-                params=params,
-                signed=True
-            )
+            response = await self._delete_signed('openOrders', params=params)
             # Очікується список, перевіряємо тип
             if isinstance(response, list):
                  return response
@@ -844,6 +1404,51 @@ class BinanceAPI:
             logger.error(f"cancel_all_orders ({symbol}): Загальна помилка: {e}", exc_info=True)
             return None
 
+    async def cancel_all_orders_parallel(self, symbol: str) -> Optional[List[Any]]:
+        """
+        Асинхронно скасовує всі відкриті ордери символу паралельними DELETE /order.
+        Ноги одного OCO скасовуються одним запитом. Кількість одночасних запитів
+        обмежена MAX_PARALLEL_CANCELS. Повертає список відповідей про скасування.
+        """
+        if not symbol:
+            logger.error("cancel_all_orders_parallel: Потрібно вказати 'symbol'.")
+            return None
+        open_orders = await self.get_open_orders(symbol)
+        if open_orders is None:
+            return None
+        if not open_orders:
+            logger.info(f"cancel_all_orders_parallel: Немає відкритих ордерів для {symbol}.")
+            return []
+
+        # Скасування однієї ноги OCO скасовує весь список - друга нога пропускається
+        order_ids = []
+        seen_lists = set()
+        for order in open_orders:
+            order_list_id = order.get('orderListId', -1)
+            if order_list_id != -1:
+                if order_list_id in seen_lists:
+                    continue
+                seen_lists.add(order_list_id)
+            order_ids.append(order['orderId'])
+
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_CANCELS)
+
+        async def _cancel(order_id):
+            async with semaphore:
+                return await self.cancel_order(symbol=symbol, orderId=order_id)
+
+        results = await asyncio.gather(*[_cancel(order_id) for order_id in order_ids], return_exceptions=True)
+
+        cancelled = []
+        for order_id, result in zip(order_ids, results):
+            if isinstance(result, Exception):
+                logger.error("cancel_all_orders_parallel (%s): Помилка скасування %s: %r", symbol, order_id, result)
+            elif result and 'code' not in result:
+                # None - помилка (залогована в cancel_order); {} / {'code': -2011} - ордера вже немає
+                cancelled.append(result)
+        logger.info(f"cancel_all_orders_parallel ({symbol}): Скасовано {len(cancelled)} з {len(order_ids)}.")
+        return cancelled
+
     async def get_open_orders(self, symbol: Optional[str] = None) -> Optional[List[Any]]:
         """
         Асинхронно отримує список активних (відкритих) ордерів. Потребує підпису.
@@ -851,14 +1456,9 @@ class BinanceAPI:
         """
         params = {}
         if symbol:
-            params['symbol'] = symbol.upper()
+            params['symbol'] = _up(symbol)
         try:
-            response = await self._send_request(
-                method='GET',
-                endpoint_path='openOrders',
-                params=params,
-                signed=True
-            )
+            response = await self._get_signed('openOrders', params=params)
             if isinstance(response, list):
                  return response
             else:
@@ -868,7 +1468,7 @@ class BinanceAPI:
             logger.error(f"get_open_orders: Помилка API: {e}")
             return None
         except Exception as e:
-            logger.error(f"get_open_orders: Загальна помилка: {e}", exc_info=True)
+            logger.error("get_open_orders: Загальна помилка: %r", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
     async def get_order_status(self, **params) -> Optional[Dict[str, Any]]:
@@ -883,16 +1483,10 @@ class BinanceAPI:
             logger.error("get_order_status: Потрібно вказати 'symbol' та один з 'orderId' або 'origClientOrderId'.")
             return None
 
-        status_params = params.copy()
-        status_params['symbol'] = status_params['symbol'].upper()
+        status_params = {**params, 'symbol': _up(params['symbol'])}
 
         try:
-            response = await self._send_request(
-                method='GET',
-                endpoint_path='order',
-                params=status_params,
-                signed=True
-            )
+            response = await self._get_signed('order', params=status_params)
             if isinstance(response, dict):
                  return response
             else:
@@ -906,7 +1500,7 @@ class BinanceAPI:
                 logger.error(f"get_order_status: Помилка API: {e}")
                 return None
         except Exception as e:
-            logger.error(f"get_order_status: Загальна помилка: {e}", exc_info=True)
+            logger.error("get_order_status: Загальна помилка: %r", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
     async def get_order_list(self, **params) -> Optional[Dict[str, Any]]:
@@ -928,12 +1522,7 @@ class BinanceAPI:
         query_params = {k: v for k, v in params.items() if v is not None}
 
         try:
-            response = await self._send_request(
-                method='GET',
-                endpoint_path='orderList',
-                params=query_params,
-                signed=True
-            )
+            response = await self._get_signed('orderList', params=query_params)
             # _send_request поверне dict або None
             if isinstance(response, dict):
                 return response
@@ -998,7 +1587,12 @@ class BinanceAPI:
 
         key_preview = listen_key[:5]
         logger.debug(f"AsyncAPI: Спроба оновлення listenKey: {key_preview}...")
-        params = {'listenKey': listen_key}
+        # Query string для ключа кодується один раз і перевикористовується кожні 30 хв
+        cached_query = self._keepalive_query
+        if cached_query is None or cached_query[0] != listen_key:
+            cached_query = (listen_key, urlencode({'listenKey': listen_key}))
+            self._keepalive_query = cached_query
+        params = cached_query[1]
 
         try:
             response = await self._send_request(
@@ -1020,7 +1614,7 @@ class BinanceAPI:
             logger.error(f"keep_alive_user_data_stream ({key_preview}): Помилка API: {e}")
             return False
         except Exception as e:
-            logger.error(f"keep_alive_user_data_stream ({key_preview}): Загальна помилка: {e}", exc_info=True)
+            logger.error("keep_alive_user_data_stream (%s): Загальна помилка: %r", key_preview, e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return False
 
     async def close_user_data_stream(self, listen_key: str) -> bool:
@@ -1056,7 +1650,7 @@ class BinanceAPI:
             logger.error(f"close_user_data_stream ({key_preview}): Помилка API: {e}")
             return False
         except Exception as e:
-            logger.error(f"close_user_data_stream ({key_preview}): Загальна помилка: {e}", exc_info=True)
+            logger.error("close_user_data_stream (%s): Загальна помилка: %r", key_preview, e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return False
 
 # END BLOCK 9
@@ -1069,12 +1663,28 @@ class BinanceWebSocketHandler:
     АСИНХРОННИЙ обробник WebSocket з'єднань Binance (Market Data + User Data).
     Використовує aiohttp, керується через asyncio.Task.
     Забезпечує перепідключення та викликає callbacks.
+    Розрахований на роботу під uvloop (install_uvloop() у точці входу), але працює і на стандартному циклі.
     """
+    # Максимум подій в одному виклику пакетного callback ('kline_batch', 'trade_batch', 'depth_batch')
+    MAX_CALLBACK_BATCH = 64
+    # Розмір черги отриманих кадрів між читанням сокета та обробкою
+    RX_QUEUE_MAXSIZE = 2048
+    # Крок очікування до наступного оновлення listenKey (секунди)
+    LISTEN_KEY_WAKEUP_INTERVAL = 5.0
+    # Перепідключення: межі затримки (decorrelated jitter) та час, після якого з'єднання вважається стабільним
+    RECONNECT_MIN_DELAY = 5.0
+    RECONNECT_MAX_DELAY = 60.0
+    RECONNECT_STABLE_AFTER = 30.0
+    # Інтервал власних ping (секунди); Binance сам надсилає ping кожні ~3 хв
+    WS_HEARTBEAT = 180.0
+    # Розмір спільної черги подій User Data Stream ('order_update', 'balance_update')
+    USER_CALLBACK_QUEUE_MAXSIZE = 1000
     def __init__(self,
                  streams: List[str],
                  callbacks: Dict[str, Callable],
                  api: BinanceAPI, # Тепер обов'язковий, використовуємо його сесію
-                 ws_log_level: int = logging.WARNING # Рівень логування для бібліотеки (якщо потрібно)
+                 ws_log_level: int = logging.WARNING, # Рівень логування для бібліотеки (якщо потрібно)
+                 connected_event: Optional[threading.Event] = None
                 ):
         """
         Ініціалізація асинхронного обробника WebSocket.
@@ -1083,28 +1693,85 @@ class BinanceWebSocketHandler:
             streams (List[str]): Список ринкових потоків (напр., ['btcusdt@kline_1m']).
             callbacks (Dict[str, Callable]): Словник callback-функцій
                                              (ключі: 'kline', 'trade', 'depth', 'order_update', 'balance_update', 'other_market', 'other_user').
+                                             Замість 'kline'/'trade'/'depth' можна передати '<ключ>_batch' - callback отримає
+                                             список кортежів аргументів за всі кадри, що вже чекають у черзі обробки.
+                                             Кожен кадр розбирається один раз: callbacks отримують уже розібраний об'єкт
+                                             (без копії) і не повинні повторно серіалізувати/розбирати його.
             api (BinanceAPI): Екземпляр АСИНХРОННОГО BinanceAPI (для сесії та оновлення listenKey).
             ws_log_level (int): Рівень логування для діагностики (не використовується безпосередньо aiohttp).
+            connected_event (threading.Event): Подія, що встановлюється при відкритті з'єднання і скидається
+                                               при його закритті - для очікування підключення з інших потоків.
         """
         self.raw_streams = streams
+        self.connected_event = connected_event
         self.callbacks = callbacks
+        # Callbacks гарячого шляху як атрибути (None, якщо не зареєстровано) - без dict.get на кожен кадр
+        self._kline_cb: Optional[Callable] = callbacks.get('kline')
+        self._trade_cb: Optional[Callable] = callbacks.get('trade')
+        self._depth_cb: Optional[Callable] = callbacks.get('depth')
+        self._other_market_cb: Optional[Callable] = callbacks.get('other_market')
+        self._other_user_cb: Optional[Callable] = callbacks.get('other_user')
+        # Чи є callback корутиною - визначається один раз, а не на кожне повідомлення
+        self._callback_is_coro: Dict[str, bool] = {name: asyncio.iscoroutinefunction(cb) for name, cb in callbacks.items()}
+        # Таблиця обробників ринкових потоків за типом потоку (частина після '@' без '_<параметр>')
+        self._dispatch: Dict[str, Callable] = {
+            'kline': self._handle_kline_event,
+            'trade': self._handle_trade_event,
+            'aggTrade': self._handle_trade_event,
+            'depth': self._handle_depth_event,
+            'depth5': self._handle_depth_event,
+            'depth10': self._handle_depth_event,
+            'depth20': self._handle_depth_event,
+        }
+        # Callback для подій User Data Stream за полем 'e' (інші події - в 'other_user')
+        self._user_event_map: Dict[str, str] = {
+            _EXECUTION_REPORT: 'order_update',
+            _OUTBOUND_ACCOUNT_POSITION: 'balance_update',
+            _BALANCE_UPDATE: 'balance_update',
+        }
+        # Накопичені події для пакетних callbacks (лише для зареєстрованих '<ключ>_batch')
+        self._pending_batches: Dict[str, List[tuple]] = {
+            name: [] for name in ('kline', 'trade', 'depth') if f'{name}_batch' in callbacks
+        }
+        self._pending_batch_size = 0
+        # Розібрані імена потоків: stream_name -> (SYMBOL, тип потоку, обробник або None)
+        self._stream_cache: Dict[str, tuple] = {}
+        # Підписані потоки розбираються одразу: SYMBOL в верхньому регістрі готовий до першого кадру
+        for stream_name in streams:
+            if stream_name:
+                self._parse_stream_name(stream_name)
         self.api = api # Використовуємо переданий екземпляр Async BinanceAPI
         self.use_testnet = api.use_testnet # Беремо режим з API
 
         # Визначаємо базові URL для WebSocket (з API)
         self.ws_url_base = api.ws_url_base
-        self.ws_combined_url_base = urljoin(self.ws_url_base, "/stream?streams=")
-        self.ws_single_url_base = urljoin(self.ws_url_base, "/ws/")
+        ws_url_root = self.ws_url_base.rstrip('/')
+        self.ws_combined_url_base = f"{ws_url_root}/stream?streams="
+        self.ws_single_url_base = f"{ws_url_root}/ws/"
+        # Об'єднана частина URL з ринкових потоків: перебудовується лише при зміні raw_streams
+        self._market_streams_key: tuple = tuple(streams)
+        self._market_streams_part: str = '/'.join(s for s in streams if s)
 
         # Стан WebSocket
         self.ws: Optional[aiohttp.ClientWebSocketResponse] = None # З'єднання WebSocket
         self.main_task: Optional[asyncio.Task] = None # Головна задача обробки
         self.listen_key: Optional[str] = None
         self.listen_key_refresh_task: Optional[asyncio.Task] = None # Задача оновлення ключа
+        # Черга отриманих кадрів та задача-споживач, що парсить їх і викликає callbacks (створюються в start())
+        self._rx_queue: Optional[asyncio.Queue] = None
+        self._consumer_task: Optional[asyncio.Task] = None
+        # Спільна черга подій користувача (cb_key, data, E) та її задача: порядок подій зберігається (створюються в start())
+        self._user_callback_queue: Optional[asyncio.Queue] = None
+        self._user_callback_task: Optional[asyncio.Task] = None
+        # Задача закриття WS при зміні listenKey (див. set_listen_key)
+        self._ws_close_task: Optional[asyncio.Task] = None
+        # Цикл подій обробника (фіксується в start(), для викликів set_listen_key з інших потоків)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rx_queue_dropped_count = 0 # Скільки найстаріших кадрів відкинуто через заповнену чергу
 
         # Стан з'єднання та перепідключення
         self.connected: bool = False
-        self.reconnect_delay: float = 5.0 # Початкова затримка (float)
+        self.reconnect_delay: float = self.RECONNECT_MIN_DELAY # Початкова затримка (float)
 
         # --- Налаштування логування (залишаємо для інформації, aiohttp логує через свій механізм) ---
         # aiohttp використовує стандартний logging, але має свої імена логерів ('aiohttp.client', 'aiohttp.web', etc.)
@@ -1125,15 +1792,9 @@ class BinanceWebSocketHandler:
         """
         Встановлює або скидає listenKey для User Data Stream.
         Керує задачею оновлення ключа та сигналізує про необхідність перепідключення.
-        Цей метод сам по собі синхронний, але запускає/зупиняє асинхронні задачі.
+        Може викликатися з іншого потоку (напр., BotCore): робота із задачами asyncio
+        передається в цикл обробника через call_soon_threadsafe.
         """
-        # Використовуємо asyncio.Lock для безпечної зміни listen_key та стану задач
-        # Оскільки цей метод може викликатися з іншого потоку (напр., BotCore),
-        # а керує asyncio задачами, краще використовувати lock.
-        # Однак, прямо зараз lock не використовується, покладаємось на GIL та
-        # те, що оновлення listen_key відбувається не надто часто.
-        # TODO: Розглянути використання asyncio.Lock або run_coroutine_threadsafe, якщо будуть проблеми.
-
         current_key = self.listen_key
         if listen_key == current_key:
             return # Ключ не змінився
@@ -1142,25 +1803,31 @@ class BinanceWebSocketHandler:
         logger.info(f"AsyncWS: Встановлення нового listenKey: {new_key_preview}...")
         self.listen_key = listen_key
 
-        # Зупиняємо попередню задачу оновлення (якщо є)
-        # Потрібно робити це з циклу asyncio, якщо він є, або через run_coroutine_threadsafe
-        # Поки що просто скасовуємо задачу, якщо вона існує
+        # Цикл фіксується в start(); до start() - поточний цикл, якщо викликано з нього
+        loop = self._loop
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Задача оновлення ключа запуститься в start()
+                logger.debug("AsyncWS: Обробник ще не запущено, listenKey буде застосовано в start().")
+                return
+        try:
+            loop.call_soon_threadsafe(self._apply_listen_key_change)
+        except RuntimeError as e: # Цикл закрито
+            logger.error(f"AsyncWS: Не вдалося передати зміну listenKey в event loop: {e}")
+
+    def _apply_listen_key_change(self):
+        """Виконується в циклі обробника: перезапускає оновлення ключа та закриває WS для перепідключення."""
+        # Зупиняємо попередню задачу оновлення (якщо є); не чекаємо завершення, щоб не блокувати
         if self.listen_key_refresh_task and not self.listen_key_refresh_task.done():
              logger.info("AsyncWS: Скасування попередньої задачі оновлення listenKey...")
              self.listen_key_refresh_task.cancel()
-             # Не чекаємо тут завершення, щоб не блокувати
 
         # Запускаємо нову задачу оновлення, якщо ключ валідний
         if self.listen_key and self.api:
-             # Запускаємо асинхронну задачу з основного потоку (або звідки викликається set_listen_key)
-             # Це може потребувати наявності запущеного event loop
              try:
-                 # Спробуємо отримати поточний цикл подій
-                 loop = asyncio.get_running_loop()
-                 # Запускаємо _start_listen_key_refresh_task в цьому циклі
-                 loop.create_task(self._start_listen_key_refresh_task())
-             except RuntimeError:
-                 logger.error("AsyncWS: Немає активного event loop для запуску задачі оновлення listenKey.")
+                 asyncio.get_running_loop().create_task(self._start_listen_key_refresh_task())
              except Exception as e:
                   logger.error(f"AsyncWS: Помилка запуску задачі оновлення listenKey: {e}")
 
@@ -1168,33 +1835,44 @@ class BinanceWebSocketHandler:
         # якщо вона вже запущена
         if self.main_task and not self.main_task.done():
             logger.info("AsyncWS: ListenKey змінено, сигналізуємо основній задачі про перепідключення...")
-            # Найпростіший спосіб - скасувати поточне з'єднання WebSocket.
+            # Найпростіший спосіб - закрити поточне з'єднання WebSocket.
             # Цикл _run_loop() автоматично спробує перепідключитися з новим URL.
             ws_conn_to_close = self.ws # Отримуємо поточне посилання
-            if ws_conn_to_close and not ws_conn_to_close.closed:
-                 # Запускаємо закриття асинхронно, щоб не блокувати поточний потік
+            # Пропускаємо повторне закриття при швидких послідовних викликах set_listen_key
+            close_pending = self._ws_close_task is not None and not self._ws_close_task.done()
+            if ws_conn_to_close and not ws_conn_to_close.closed and not close_pending \
+                    and not getattr(ws_conn_to_close, '_closing', False):
                  try:
-                      loop = asyncio.get_running_loop()
-                      # Викликаємо close() для об'єкту з'єднання
-                      loop.create_task(ws_conn_to_close.close(code=aiohttp.WSCloseCode.GOING_AWAY, message=b'Listen key updated'))
+                      # Посилання на задачу закриття зберігаємо
+                      self._ws_close_task = asyncio.get_running_loop().create_task(
+                          ws_conn_to_close.close(code=aiohttp.WSCloseCode.GOING_AWAY, message=b'Listen key updated'))
+                      self._ws_close_task.add_done_callback(self._handle_ws_close_task_completion)
                       logger.debug("AsyncWS: Запущено задачу закриття WS для перепідключення.")
-                 except RuntimeError:
-                      logger.error("AsyncWS: Немає активного event loop для закриття WS з'єднання.")
                  except Exception as e:
                       logger.error(f"AsyncWS: Помилка закриття WS для перепідключення: {e}")
 
+    def _handle_ws_close_task_completion(self, task: asyncio.Task):
+        """Callback завершення задачі закриття WS: забирає виняток, щоб він не губився."""
+        if task.cancelled():
+            return
+        close_error = task.exception()
+        if close_error:
+            logger.debug(f"AsyncWS: Помилка закриття WS для перепідключення: {close_error!r}")
+
     def _get_stream_url(self) -> str:
-        """Формує URL для WebSocket з'єднання."""
-        active_market_streams = [s for s in self.raw_streams if s]
-        all_active_streams = list(active_market_streams)
-        if self.listen_key:
-            all_active_streams.append(self.listen_key)
-
-        if not all_active_streams:
-            return ""
-        else:
-            streams_part = '/'.join(all_active_streams)
-            return self.ws_combined_url_base + streams_part
+        """Формує URL для WebSocket з'єднання. Частина ринкових потоків береться з кешу."""
+        market_streams = tuple(self.raw_streams)
+        if market_streams != self._market_streams_key:
+            self._market_streams_key = market_streams
+            self._market_streams_part = '/'.join(s for s in market_streams if s)
+        market_part = self._market_streams_part
+        listen_key = self.listen_key
+
+        if listen_key:
+            if market_part:
+                return f"{self.ws_combined_url_base}{market_part}/{listen_key}"
+            return self.ws_combined_url_base + listen_key
+        return self.ws_combined_url_base + market_part if market_part else ""
 
     async def _start_listen_key_refresh_task(self):
         """Асинхронно створює та запускає задачу для оновлення listenKey."""
@@ -1254,18 +1932,23 @@ class BinanceWebSocketHandler:
 
              try:
                  # Чекаємо перед наступним оновленням
-                 wait_time_log = f"{refresh_wait_time:.1f}s"
-                 key_preview_log = current_key[:5]
-                 logger.debug(f"AsyncWS ({task_name}): Наступне оновлення lKey ({key_preview_log}...) через {wait_time_log}.")
-                 # Використовуємо asyncio.sleep(), який можна перервати через скасування задачі
-                 await asyncio.sleep(refresh_wait_time)
+                 logger.debug("AsyncWS (%s): Наступне оновлення lKey (%.5s...) через %.1fs.", task_name, current_key, refresh_wait_time)
+                 # Короткі кроки до монотонного дедлайну: пізнє відновлення задачі або стрибок
+                 # системного годинника не зсувають оновлення, а зміна ключа помічається одразу
+                 deadline = time.monotonic() + refresh_wait_time
+                 while self.listen_key == current_key:
+                      remaining = deadline - time.monotonic()
+                      if remaining <= 0:
+                           break
+                      await asyncio.sleep(min(self.LISTEN_KEY_WAKEUP_INTERVAL, remaining))
 
                  # Перевіряємо ключ ще раз (міг змінитися) і чи не скасовано задачу
                  # Перевірка на скасування не потрібна явно, бо await asyncio.sleep() підніме CancelledError
                  if self.listen_key == current_key:
-                      logger.debug(f"AsyncWS ({task_name}): Спроба оновити listenKey: {key_preview_log}...")
-                      # Викликаємо асинхронний метод API
-                      update_success = await self.api.keep_alive_user_data_stream(current_key)
+                      logger.debug("AsyncWS (%s): Спроба оновити listenKey: %.5s...", task_name, current_key)
+                      # Викликаємо асинхронний метод API під shield: скасування задачі не обриває
+                      # HTTP-запит посередині, і з'єднання повертається в пул aiohttp штатно
+                      update_success = await asyncio.shield(self.api.keep_alive_user_data_stream(current_key))
 
                       if not update_success:
                            logger.warning(f"AsyncWS ({task_name}): Не вдалося оновити listenKey! Можлива проблема зі з'єднанням або ключем.")
@@ -1301,6 +1984,28 @@ class BinanceWebSocketHandler:
             return
 
         logger.info("AsyncWS: Запуск основної задачі обробки WebSocket...")
+        self._loop = asyncio.get_running_loop()
+        # listenKey міг бути встановлений до запуску - запускаємо його оновлення
+        if self.listen_key and self.api:
+            await self._start_listen_key_refresh_task()
+        # Кадри читаються в _run_loop, а обробляються окремою задачею, щоб повільний callback не зупиняв читання сокета
+        # Попередня задача-споживач (якщо лишилась після завершення основної задачі) скасовується
+        old_consumer_task = self._consumer_task
+        if old_consumer_task and not old_consumer_task.done():
+            old_consumer_task.cancel()
+        self._rx_queue = asyncio.Queue(maxsize=self.RX_QUEUE_MAXSIZE)
+        self._start_consumer_task()
+        # Callbacks подій користувача виконує одна задача зі спільною чергою (порядок ордерів і балансу зберігається),
+        # синхронні callbacks - у потоці виконавця: повільний 'order_update' не затримує ринкові дані
+        old_callback_task = self._user_callback_task
+        if old_callback_task and not old_callback_task.done():
+            old_callback_task.cancel()
+        self._user_callback_task = None
+        self._user_callback_queue = None
+        if any(self.callbacks.get(cb_key) for cb_key in self._user_event_map.values()):
+            self._user_callback_queue = asyncio.Queue(maxsize=self.USER_CALLBACK_QUEUE_MAXSIZE)
+            self._user_callback_task = asyncio.create_task(
+                self._user_callback_loop(self._user_callback_queue), name="WebSocketUserCallbacks")
         # Створюємо задачу, яка буде виконувати _run_loop
         self.main_task = asyncio.create_task(self._run_loop(), name="WebSocketRunLoop")
         # Додаємо callback, який буде викликано при завершенні задачі (штатному або через помилку)
@@ -1335,6 +2040,29 @@ class BinanceWebSocketHandler:
             logger.debug("AsyncWS: Немає активної основної задачі для зупинки.")
             self.main_task = None # Про всяк випадок
 
+        # 2.1. Зупиняємо задачу обробки черги кадрів
+        consumer_task = self._consumer_task
+        if consumer_task and not consumer_task.done():
+            consumer_task.cancel()
+            try:
+                await asyncio.wait_for(consumer_task, timeout=1.0)
+            except asyncio.CancelledError:
+                logger.debug("AsyncWS: Задача обробки кадрів скасована (очікувано).")
+            except asyncio.TimeoutError:
+                logger.warning("AsyncWS: Таймаут очікування завершення задачі обробки кадрів.")
+            except Exception as e:
+                logger.error(f"AsyncWS: Помилка під час очікування завершення задачі обробки кадрів: {e}")
+        self._consumer_task = None
+        self._rx_queue = None
+
+        # 2.2. Зупиняємо задачу callbacks подій користувача
+        callback_task = self._user_callback_task
+        if callback_task and not callback_task.done():
+            callback_task.cancel()
+            await asyncio.gather(callback_task, return_exceptions=True)
+        self._user_callback_task = None
+        self._user_callback_queue = None
+
         # 3. Переконуємось, що стан connected = False
         # (має встановитися в finally блоці _run_loop або при помилці)
         if self.connected:
@@ -1356,6 +2084,25 @@ class BinanceWebSocketHandler:
 
         logger.info("AsyncWS: Процедуру зупинки WebSocket Handler завершено.")
 
+    def _start_consumer_task(self):
+        """Створює задачу-споживача черги кадрів з callback перезапуску при аварійному завершенні."""
+        consumer_task = asyncio.create_task(self._consume_loop(), name="WebSocketConsumer")
+        consumer_task.add_done_callback(self._handle_consumer_task_completion)
+        self._consumer_task = consumer_task
+
+    def _handle_consumer_task_completion(self, task: asyncio.Task):
+        """Callback завершення задачі-споживача: при помилці логує її та перезапускає задачу, поки працює основна."""
+        if task.cancelled():
+            return
+        exception = task.exception()
+        if exception is None:
+            return
+        logger.critical(f"AsyncWS: Задача обробки кадрів ({task.get_name()}) завершилася з помилкою:", exc_info=exception)
+        main_task = self.main_task
+        if task is self._consumer_task and main_task is not None and not main_task.done():
+            logger.warning("AsyncWS: Перезапуск задачі обробки кадрів.")
+            self._start_consumer_task()
+
     def _handle_main_task_completion(self, task: asyncio.Task):
         """Callback для обробки завершення основної задачі _run_loop."""
         # Цей метод синхронний, бо викликається з add_done_callback
@@ -1382,9 +2129,11 @@ class BinanceWebSocketHandler:
         """Основний асинхронний цикл для підключення та обробки повідомлень WebSocket."""
         task_name = asyncio.current_task().get_name() if asyncio.current_task() else "WebSocketRunLoop"
         logger.info(f"AsyncWS ({task_name}): Запуск основного циклу.")
+        rx_queue = self._rx_queue # Створюється в start()
 
         while True: # Нескінченний цикл перепідключення
             connection_closed_normally = False
+            connected_at: Optional[float] = None
             try:
                 # Перевірка скасування на початку ітерації
                 # --- ВИПРАВЛЕННЯ: Краще перевіряти через task.cancelled() ---
@@ -1398,7 +2147,7 @@ class BinanceWebSocketHandler:
                 if not self.api or not self.api.session or self.api.session.closed:
                      logger.error(f"AsyncWS ({task_name}): API або сесія aiohttp недоступні. Пауза...")
                      await asyncio.sleep(self.reconnect_delay)
-                     self.reconnect_delay = min(self.reconnect_delay * 1.5, 60.0)
+                     self._advance_reconnect_delay()
                      continue # Наступна спроба
 
                 # Отримуємо URL
@@ -1410,47 +2159,52 @@ class BinanceWebSocketHandler:
 
                 logger.info(f"AsyncWS ({task_name}): Спроба підключення до {stream_url}")
                 # Встановлюємо з'єднання за допомогою сесії API
-                async with self.api.session.ws_connect(stream_url, heartbeat=60) as ws:
+                # Без permessage-deflate (дані Binance не стиснені) та без ліміту розміру кадру
+                async with self.api.session.ws_connect(stream_url,
+                                                       heartbeat=self.WS_HEARTBEAT,
+                                                       compress=0,
+                                                       autoclose=True,
+                                                       autoping=True,
+                                                       max_msg_size=0,
+                                                       **_WS_CONNECT_TEXT_OPTIONS) as ws:
                     # Успішне підключення
                     self.ws = ws # Зберігаємо посилання на з'єднання
                     self.connected = True
-                    self.reconnect_delay = 5.0 # Скидаємо затримку при успішному підключенні
+                    connected_at = time.monotonic() # Затримка скидається, якщо з'єднання протрималось RECONNECT_STABLE_AFTER
                     self._on_open() # Викликаємо callback
                     logger.info(f"AsyncWS ({task_name}): Успішно підключено.")
 
                     # Цикл обробки повідомлень
-                    async for msg in ws:
-                        # Перевірка скасування всередині циклу обробки
-                        # --- ВИПРАВЛЕННЯ: Краще перевіряти через task.cancelled() ---
-                        # if asyncio.current_task().cancelled():
-                        if current_task and current_task.cancelled():
-                             logger.info(f"AsyncWS ({task_name}): Задача скасована під час отримання повідомлень.")
-                             # Закриваємо з'єднання перед виходом
-                             await ws.close(code=aiohttp.WSCloseCode.GOING_AWAY, message=b'Task cancelled')
-                             connection_closed_normally = True # Вважаємо це нормальним закриттям у контексті скасування
-                             break # Виходимо з циклу async for
-
-                        # Обробляємо повідомлення
-                        await self._on_message(msg) # <--- Зробили _on_message асинхронним
-
-                        # Перевірка на помилки WebSocket
-                        if msg.type in (WSMsgType.ERROR, WSMsgType.CLOSED, WSMsgType.CLOSING):
+                    # Скасування задачі приходить як CancelledError на найближчому await
+                    # (обробляється у зовнішньому except), окрема перевірка на кожен кадр не потрібна
+                    while True:
+                        msg = await ws.receive()
+                        msg_type = msg.type
+                        # Кадри з даними передаються в чергу задачі-споживача
+                        if msg_type is WSMsgType.TEXT or msg_type is WSMsgType.BINARY:
+                            try:
+                                rx_queue.put_nowait(msg)
+                            except asyncio.QueueFull:
+                                # Читання сокета не зупиняється: відкидаємо найстаріший кадр і ставимо новий
+                                rx_queue.get_nowait()
+                                rx_queue.put_nowait(msg)
+                                self.rx_queue_dropped_count += 1
+                                logger.warning("AsyncWS (%s): Черга обробки заповнена (%d), відкинуто найстаріший кадр (всього %d).",
+                                               task_name, rx_queue.maxsize, self.rx_queue_dropped_count)
+                            continue
+
+                        # Закриття з'єднання (сервером або нами) чи помилка WebSocket
+                        if msg_type in _WS_CLOSE_TYPES:
                              ws_exception = ws.exception()
-                             log_msg = f"AsyncWS ({task_name}): Отримано {msg.type}."
+                             log_msg = f"AsyncWS ({task_name}): Отримано {msg_type.name}."
                              if ws_exception:
                                  log_msg += f" Помилка: {ws_exception}."
                              logger.warning(log_msg + " Розрив з'єднання.")
-                             if msg.type == WSMsgType.ERROR and ws_exception:
+                             if msg_type is WSMsgType.ERROR and ws_exception:
                                  self._on_error(ws_exception) # Передаємо виняток в обробник
                              connection_closed_normally = True # Вважаємо нормальним закриттям, якщо це не помилка з'єднання
-                             break # Виходимо з циклу async for, щоб перепідключитися
-
-                    # Якщо цикл async for завершився без break (тобто з'єднання закрито сервером або іншою стороною)
-                    # --- ВИПРАВЛЕННЯ: Краще перевіряти через task.cancelled() ---
-                    # if not asyncio.current_task().cancelled() and not connection_closed_normally:
-                    if not (current_task and current_task.cancelled()) and not connection_closed_normally:
-                         logger.warning(f"AsyncWS ({task_name}): Цикл обробки повідомлень завершився (з'єднання закрито?).")
-                         connection_closed_normally = True # Вважаємо нормальним закриттям з боку сервера
+                             break # Виходимо з циклу читання, щоб перепідключитися
+                        # Інші службові кадри (PING/PONG тощо) aiohttp обробляє сам
 
             except asyncio.CancelledError:
                 logger.info(f"AsyncWS ({task_name}): Основний цикл скасовано.")
@@ -1472,6 +2226,8 @@ class BinanceWebSocketHandler:
                 self.ws = None
                 if was_connected: # Викликаємо on_close тільки якщо були підключені
                      self._on_close()
+                if connected_at is not None and time.monotonic() - connected_at >= self.RECONNECT_STABLE_AFTER:
+                     self.reconnect_delay = self.RECONNECT_MIN_DELAY
 
                 # Перевіряємо, чи потрібно перепідключатися
                 # Не перепідключаємось, якщо задача була скасована ззовні
@@ -1488,190 +2244,314 @@ class BinanceWebSocketHandler:
                      try:
                           await asyncio.sleep(self.reconnect_delay)
                           # Збільшуємо затримку для наступного разу
-                          self.reconnect_delay = min(self.reconnect_delay * 1.5, 60.0)
+                          self._advance_reconnect_delay()
                      except asyncio.CancelledError:
                           logger.info(f"AsyncWS ({task_name}): Скасовано під час паузи перед перепідключенням.")
                           break # Виходимо з головного циклу
 
         logger.info(f"AsyncWS ({task_name}): Основний цикл завершено.")
 
+    def _advance_reconnect_delay(self):
+        """
+        Наступна затримка перепідключення за схемою decorrelated jitter:
+        випадкова в [RECONNECT_MIN_DELAY, 3 * поточна], не більше RECONNECT_MAX_DELAY.
+        Рознесені в часі перепідключення не б'ють у Binance одночасно після масового розриву.
+        """
+        self.reconnect_delay = min(self.RECONNECT_MAX_DELAY,
+                                   random.uniform(self.RECONNECT_MIN_DELAY, self.reconnect_delay * 3))
+
+    async def _consume_loop(self):
+        """Задача-споживач: бере кадри з черги, парсить їх та викликає callbacks."""
+        rx_queue = self._rx_queue
+        on_message = self._on_message
+        while True:
+            msg = await rx_queue.get()
+            # Помилка одного кадру не зупиняє задачу (інакше черга заповнюється, а дані втрачаються)
+            try:
+                await on_message(msg)
+                # Кадри, що вже чекають у черзі, обробляються підряд через get_nowait() без await get() на кожен
+                while self._pending_batch_size < self.MAX_CALLBACK_BATCH and not rx_queue.empty():
+                    await on_message(rx_queue.get_nowait())
+                # Пакетні callbacks викликаються, коли черга спорожніла або пакет заповнено
+                if self._pending_batch_size:
+                    await self._flush_callback_batches()
+            except Exception as consume_err:
+                logger.error("AsyncWS: Помилка обробки кадру: %r", consume_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+    async def _user_callback_loop(self, callback_queue: asyncio.Queue):
+        """
+        Задача-споживач спільної черги подій користувача: викликає callbacks[cb_key] для кожної події
+        строго по порядку надходження. Синхронні callbacks виконуються через asyncio.to_thread,
+        щоб не блокувати цикл подій.
+        """
+        while True:
+            cb_key, data, event_time_ms = await callback_queue.get()
+            callback = self.callbacks[cb_key]
+            try:
+                if self._callback_is_coro[cb_key]:
+                    await callback(data, event_time_ms)
+                else:
+                    await asyncio.to_thread(callback, data, event_time_ms)
+            except Exception as cb_err:
+                logger.error("AsyncWS: Помилка callback '%s': %r", cb_key, cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+
 # END BLOCK 13
 
 # BLOCK 14: Async WS Handler - Callback Methods
     def _on_open(self):
         """Callback-функція при відкритті WebSocket з'єднання."""
         # Статус connected та скидання reconnect_delay тепер в _run_loop
-        logger.info(f"AsyncWS: З'єднання WebSocket ВІДКРИТО.")
+        logger.info("AsyncWS: З'єднання WebSocket ВІДКРИТО.")
+        if self.connected_event is not None:
+            self.connected_event.set()
         # Можна додати надсилання події про підключення, якщо потрібно
 
+    async def _handle_kline_event(self, symbol_upper: str, payload: Dict[str, Any], event_time_ms: Optional[int]) -> bool:
+        """Обробник kline потоку (payload - dict). Повертає True, якщо callback викликано."""
+        callback = self._kline_cb
+        batch = self._pending_batches.get('kline')
+        if not callback and batch is None:
+            return False
+        kline_data = payload.get('k')
+        if not kline_data:
+            logger.warning("AsyncWS: Не знайдено 'k' в kline payload.")
+            return False
+        if batch is not None:
+            batch.append((symbol_upper, kline_data, event_time_ms))
+            self._pending_batch_size += 1
+            return True
+        try:
+            if self._callback_is_coro['kline']:
+                await callback(symbol_upper, kline_data, event_time_ms)
+            else:
+                callback(symbol_upper, kline_data, event_time_ms)
+            return True
+        except Exception as cb_err:
+            logger.error("AsyncWS: Помилка callback 'kline': %r", cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return False
+
+    async def _handle_trade_event(self, symbol_upper: str, payload: Dict[str, Any], event_time_ms: Optional[int]) -> bool:
+        """Обробник trade/aggTrade потоку (payload - dict). Повертає True, якщо callback викликано."""
+        callback = self._trade_cb
+        batch = self._pending_batches.get('trade')
+        if not callback and batch is None:
+            return False
+        price_str = payload.get('p')
+        if not price_str:
+            logger.warning("AsyncWS: Не знайдено 'p' в trade payload.")
+            return False
+        try:
+            price = float(price_str)
+            if batch is not None:
+                batch.append((symbol_upper, price, event_time_ms))
+                self._pending_batch_size += 1
+            elif self._callback_is_coro['trade']:
+                await callback(symbol_upper, price, event_time_ms)
+            else:
+                callback(symbol_upper, price, event_time_ms)
+            return True
+        except (ValueError, TypeError):
+            logger.warning("AsyncWS: Помилка конвертації ціни '%s' в trade.", price_str)
+        except Exception as cb_err:
+            logger.error("AsyncWS: Помилка callback 'trade': %r", cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return False
+
+    async def _handle_depth_event(self, symbol_upper: str, payload: Dict[str, Any], event_time_ms: Optional[int]) -> bool:
+        """Обробник depth потоку (payload - dict). Повертає True, якщо callback викликано."""
+        callback = self._depth_cb
+        batch = self._pending_batches.get('depth')
+        if not callback and batch is None:
+            return False
+        try:
+            if batch is not None:
+                batch.append((symbol_upper, payload, event_time_ms))
+                self._pending_batch_size += 1
+            elif self._callback_is_coro['depth']:
+                await callback(symbol_upper, payload, event_time_ms)
+            else:
+                callback(symbol_upper, payload, event_time_ms)
+            return True
+        except Exception as cb_err:
+            logger.error("AsyncWS: Помилка callback 'depth': %r", cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return False
+
+    def _parse_stream_name(self, stream_name: str) -> tuple:
+        """
+        Розбирає ім'я потоку ('btcusdt@kline_1m', 'btcusdt@depth@100ms') та кешує результат.
+        Ключ диспетчеризації - тип потоку без параметрів: 'kline_1m' -> 'kline', 'depth20' -> 'depth20'.
+        """
+        symbol_part, _, rest = stream_name.partition('@')
+        stream_type_part = sys.intern(rest.partition('@')[0]) if rest else None
+        handler = self._dispatch.get(stream_type_part.partition('_')[0]) if stream_type_part else None
+        parsed_stream = (sys.intern(symbol_part.upper()), stream_type_part, handler)
+        self._stream_cache[stream_name] = parsed_stream
+        return parsed_stream
+
+    async def _flush_callback_batches(self):
+        """Викликає пакетні callbacks з накопиченими подіями та очищує накопичувачі."""
+        self._pending_batch_size = 0
+        for name, batch in self._pending_batches.items():
+            if not batch:
+                continue
+            self._pending_batches[name] = []
+            batch_key = f'{name}_batch'
+            try:
+                if self._callback_is_coro[batch_key]:
+                    await self.callbacks[batch_key](batch)
+                else:
+                    self.callbacks[batch_key](batch)
+            except Exception as cb_err:
+                logger.error("AsyncWS: Помилка callback '%s': %r", batch_key, cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+    async def _on_stream_event(self, stream_name: Optional[str], payload: Any):
+        """Обробляє подію комбінованого потоку: диспетчеризація за типом потоку або 'other_market'."""
+        # Тип payload перевіряється один раз: обробники kline/trade/depth отримують лише dict,
+        # інші форми (напр., списки '!ticker@arr') йдуть в 'other_market'
+        payload_is_dict = type(payload) is dict
+        event_time_ms = payload.get('E') if payload_is_dict else None
+        if not stream_name or payload is None:
+             logger.warning("AsyncWS: Порожні 'stream' або 'data' в комбінованому повідомленні.")
+             return
+
+        # Потік listenKey у комбінованому з'єднанні - це події User Data Stream
+        if stream_name == self.listen_key:
+            if payload_is_dict and 'e' in payload:
+                await self._on_user_event(payload['e'], payload, event_time_ms)
+            else:
+                logger.warning("AsyncWS: Подія потоку listenKey без поля 'e': %.250s", payload)
+            return
+
+        parsed_stream = self._stream_cache.get(stream_name)
+        if parsed_stream is None:
+            parsed_stream = self._parse_stream_name(stream_name)
+        symbol_upper, stream_type_part, stream_handler = parsed_stream
+        logger.debug("AsyncWS: Подія: %s, Символ: %s", stream_type_part, symbol_upper)
+
+        # --- Виклик відповідного обробника з таблиці диспетчеризації ---
+        handler = stream_handler if payload_is_dict else None
+        callback_invoked = await handler(symbol_upper, payload, event_time_ms) if handler else False
+
+        # Інші ринкові потоки
+        if not callback_invoked:
+             other_callback = self._other_market_cb
+             if other_callback:
+                  try:
+                       # --- ЗМІНА: Викликаємо асинхронний callback через await (якщо він async) ---
+                       if self._callback_is_coro['other_market']:
+                            await other_callback(stream_name, payload)
+                       else:
+                            other_callback(stream_name, payload) # Залишаємо синхронний виклик
+                       # --- КІНЕЦЬ ЗМІНИ ---
+                       callback_invoked = True
+                  except Exception as cb_err: logger.error("AsyncWS: Помилка callback 'other_market': %r", cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+        if not callback_invoked:
+             logger.warning("AsyncWS: Не знайдено обробника для ринкового потоку: %s", stream_name)
+
+    async def _on_user_event(self, event_type: str, data: Any, event_time_ms_user: Optional[int]):
+        """Обробляє подію User Data Stream: callback за типом події (_user_event_map) або 'other_user'."""
+        logger.debug("AsyncWS: Подія користувача: %s", event_type)
+        callback_invoked_user = False
+
+        cb_key = self._user_event_map.get(event_type)
+        callback = self.callbacks.get(cb_key) if cb_key else None
+        callback_queue = self._user_callback_queue if callback else None
+        if callback_queue is not None:
+            # Callback виконує задача _user_callback_loop (спільна черга - порядок подій зберігається)
+            try:
+                callback_queue.put_nowait((cb_key, data, event_time_ms_user))
+            except asyncio.QueueFull:
+                # Події ордерів/балансу не відкидаються - чекаємо місця (читання сокета не блокується)
+                logger.warning("AsyncWS: Черга callbacks подій користувача заповнена (%d), очікування.", callback_queue.maxsize)
+                await callback_queue.put((cb_key, data, event_time_ms_user))
+            callback_invoked_user = True
+        elif callback:
+            try:
+                 if self._callback_is_coro[cb_key]:
+                      await callback(data, event_time_ms_user)
+                 else:
+                      callback(data, event_time_ms_user) # Напр., синхронний BotCore._handle_order_update
+                 callback_invoked_user = True
+            except Exception as cb_err: logger.error("AsyncWS: Помилка callback '%s': %r", cb_key, cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+        # Інші події користувача
+        if not callback_invoked_user:
+            other_callback = self._other_user_cb
+            if other_callback:
+                try:
+                     # --- ЗМІНА: Викликаємо асинхронний callback через await (якщо він async) ---
+                     if self._callback_is_coro['other_user']:
+                          await other_callback(event_type, data)
+                     else:
+                          other_callback(event_type, data) # Залишаємо синхронний виклик
+                     # --- КІНЕЦЬ ЗМІНИ ---
+                     callback_invoked_user = True
+                except Exception as cb_err: logger.error("AsyncWS: Помилка callback 'other_user': %r", cb_err, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+        if not callback_invoked_user:
+             logger.warning("AsyncWS: Не знайдено відповідного обробника для події користувача: %s", event_type)
+
     async def _on_message(self, msg: aiohttp.WSMessage):
         """Асинхронний Callback при отриманні повідомлення."""
-        if msg.type == WSMsgType.TEXT:
+        # TEXT кадри приходять як bytes, якщо aiohttp підтримує decode_text=False; парсери приймають і str, і bytes
+        if msg.type == WSMsgType.TEXT or msg.type == WSMsgType.BINARY:
             message_text = msg.data
-            msg_preview = message_text[:250]
-            logger.debug(f"AsyncWS <~ RAW: {msg_preview}...")
+            # Прев'ю кадру форматується лише коли DEBUG увімкнено (%.250s обрізає рядок)
+            logger.debug("AsyncWS <~ RAW: %.250s...", message_text)
             try:
-                data = json.loads(message_text)
+                # Кадри комбінованого потоку декодуються одразу в конверт (якщо є msgspec)
+                if message_text[:10] in _STREAM_FRAME_HEADS:
+                    if _decode_stream_envelope is not None:
+                        try:
+                            envelope = _decode_stream_envelope(message_text)
+                        except ValueError:
+                            pass # Некоректний JSON або неочікувана форма - розбираємо нижче
+                        else:
+                            await self._on_stream_event(envelope.stream, envelope.data)
+                            return
+
+                data = _loads_ws_frame(message_text)
                 is_dict_data = isinstance(data, dict)
 
                 # Ігноруємо службові відповіді (напр., на підписку)
                 if is_dict_data and ('result' in data or 'id' in data):
-                    logger.debug(f"AsyncWS: Ігноруємо службове повідомлення: {data}")
+                    logger.debug("AsyncWS: Ігноруємо службове повідомлення: %s", data)
                     return
 
                 # Обробка комбінованого потоку
                 elif is_dict_data and 'stream' in data and 'data' in data:
-                    stream_name = data.get('stream')
-                    payload = data.get('data')
-                    event_time_ms = payload.get('E') if isinstance(payload, dict) else None
-                    if not stream_name or payload is None:
-                         logger.warning(f"AsyncWS: Порожні 'stream' або 'data' в комбінованому повідомленні.")
-                         return
-
-                    stream_parts = stream_name.split('@')
-                    symbol_part = stream_parts[0]
-                    symbol_upper = symbol_part.upper()
-                    stream_type_part = stream_parts[1] if len(stream_parts) > 1 else None
-                    logger.debug(f"AsyncWS: Подія: {stream_type_part}, Символ: {symbol_upper}")
-
-                    callback_invoked = False
-                    # --- Виклик відповідних callback-ів ---
-                    # Klines
-                    if stream_type_part and stream_type_part.startswith('kline'):
-                        callback = self.callbacks.get('kline')
-                        if callback:
-                            kline_data = payload.get('k') if isinstance(payload, dict) else None
-                            if kline_data:
-                                try:
-                                    # --- ЗМІНА: Викликаємо асинхронний callback через await ---
-                                    # callback(symbol_upper, kline_data, event_time_ms) # Синхронний виклик
-                                    await callback(symbol_upper, kline_data, event_time_ms) # Асинхронний виклик
-                                    # --- КІНЕЦЬ ЗМІНИ ---
-                                    callback_invoked = True
-                                except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'kline': {cb_err}", exc_info=True)
-                            else: logger.warning(f"AsyncWS: Не знайдено 'k' в kline payload.")
-
-                    # Trades
-                    elif stream_type_part and 'trade' in stream_type_part:
-                         callback = self.callbacks.get('trade')
-                         if callback:
-                              price_str = payload.get('p') if isinstance(payload, dict) else None
-                              if price_str:
-                                   try:
-                                        price_float = float(price_str)
-                                        # --- ЗМІНА: Викликаємо асинхронний callback через await (якщо він async) ---
-                                        if asyncio.iscoroutinefunction(callback):
-                                             await callback(symbol_upper, price_float, event_time_ms)
-                                        else:
-                                             callback(symbol_upper, price_float, event_time_ms) # Залишаємо синхронний виклик
-                                        # --- КІНЕЦЬ ЗМІНИ ---
-                                        callback_invoked = True
-                                   except (ValueError, TypeError): logger.warning(f"AsyncWS: Помилка конвертації ціни '{price_str}' в trade.")
-                                   except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'trade': {cb_err}", exc_info=True)
-                              else: logger.warning(f"AsyncWS: Не знайдено 'p' в trade payload.")
-
-                    # Depth
-                    elif stream_type_part and 'depth' in stream_type_part:
-                         callback = self.callbacks.get('depth')
-                         if callback:
-                              try:
-                                   # --- ЗМІНА: Викликаємо асинхронний callback через await (якщо він async) ---
-                                   if asyncio.iscoroutinefunction(callback):
-                                        await callback(symbol_upper, payload, event_time_ms)
-                                   else:
-                                        callback(symbol_upper, payload, event_time_ms) # Залишаємо синхронний виклик
-                                   # --- КІНЕЦЬ ЗМІНИ ---
-                                   callback_invoked = True
-                              except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'depth': {cb_err}", exc_info=True)
-
-                    # Інші ринкові потоки
-                    if not callback_invoked:
-                         other_callback = self.callbacks.get('other_market')
-                         if other_callback:
-                              try:
-                                   # --- ЗМІНА: Викликаємо асинхронний callback через await (якщо він async) ---
-                                   if asyncio.iscoroutinefunction(other_callback):
-                                        await other_callback(stream_name, payload)
-                                   else:
-                                        other_callback(stream_name, payload) # Залишаємо синхронний виклик
-                                   # --- КІНЕЦЬ ЗМІНИ ---
-                                   callback_invoked = True
-                              except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'other_market': {cb_err}", exc_info=True)
-
-                    if not callback_invoked:
-                         logger.warning(f"AsyncWS: Не знайдено обробника для ринкового потоку: {stream_name}")
-
+                    await self._on_stream_event(data.get('stream'), data.get('data'))
 
                 # Обробка User Data Stream
                 elif is_dict_data and 'e' in data:
                     event_type = data['e']
                     event_time_ms_user = data.get('E')
-                    logger.debug(f"AsyncWS: Подія користувача: {event_type}")
-                    callback_invoked_user = False
-
-                    if event_type == 'executionReport':
-                        callback = self.callbacks.get('order_update')
-                        if callback:
-                            try:
-                                 # --- ЗМІНА: Викликаємо асинхронний callback через await ---
-                                 # callback(data, event_time_ms_user) # Синхронний виклик
-                                 await callback(data, event_time_ms_user) # Асинхронний виклик
-                                 # --- КІНЕЦЬ ЗМІНИ ---
-                                 callback_invoked_user = True
-                            except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'order_update': {cb_err}", exc_info=True)
-
-                    elif event_type in ['outboundAccountPosition', 'balanceUpdate']:
-                        callback = self.callbacks.get('balance_update')
-                        if callback:
-                             try:
-                                 # --- ЗМІНА: Викликаємо асинхронний callback через await ---
-                                 # callback(data, event_time_ms_user) # Синхронний виклик
-                                 await callback(data, event_time_ms_user) # Асинхронний виклик
-                                 # --- КІНЕЦЬ ЗМІНИ ---
-                                 callback_invoked_user = True
-                             except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'balance_update': {cb_err}", exc_info=True)
-
-                    # Інші події користувача
-                    if not callback_invoked_user:
-                        other_callback = self.callbacks.get('other_user')
-                        if other_callback:
-                            try:
-                                 # --- ЗМІНА: Викликаємо асинхронний callback через await (якщо він async) ---
-                                 if asyncio.iscoroutinefunction(other_callback):
-                                      await other_callback(event_type, data)
-                                 else:
-                                      other_callback(event_type, data) # Залишаємо синхронний виклик
-                                 # --- КІНЕЦЬ ЗМІНИ ---
-                                 callback_invoked_user = True
-                            except Exception as cb_err: logger.error(f"AsyncWS: Помилка callback 'other_user': {cb_err}", exc_info=True)
-
-                    if not callback_invoked_user:
-                         logger.warning(f"AsyncWS: Не знайдено відповідного обробника для події користувача: {event_type}")
+                    await self._on_user_event(event_type, data, event_time_ms_user)
 
                 # Якщо формат не розпізнано
                 else:
-                    logger.warning(f"AsyncWS: Отримано повідомлення невідомого JSON формату: {msg_preview}...")
+                    logger.warning("AsyncWS: Отримано повідомлення невідомого JSON формату: %.250s...", message_text)
 
-            except json.JSONDecodeError:
-                logger.error(f"AsyncWS: Помилка парсингу JSON: {msg_preview}...")
+            except ValueError: # json.JSONDecodeError, orjson.JSONDecodeError та помилки simdjson
+                logger.error("AsyncWS: Помилка парсингу JSON: %.250s...", message_text)
             except Exception as e:
-                logger.error(f"AsyncWS: Помилка обробки повідомлення: {e}", exc_info=True)
+                logger.error("AsyncWS: Помилка обробки повідомлення: %r", e, exc_info=logger.isEnabledFor(logging.DEBUG))
 
-        elif msg.type == WSMsgType.BINARY:
-            logger.warning("AsyncWS: Отримано бінарне повідомлення (не очікується).")
         # Обробка WSMsgType.ERROR/CLOSED/CLOSING тепер відбувається в _run_loop
 
     def _on_error(self, error: Exception):
         """Callback-функція при виникненні помилки WebSocket."""
         # Логування помилки тепер відбувається в _run_loop перед викликом цього методу
         # Встановлення self.connected = False також відбувається в _run_loop
-        logger.debug(f"AsyncWS: Викликано _on_error. Помилка: {error}")
+        logger.debug("AsyncWS: Викликано _on_error. Помилка: %s", error)
         # Можна додати надсилання події про помилку, якщо потрібно
 
     def _on_close(self):
         """Callback-функція при закритті WebSocket з'єднання."""
         # Логування та встановлення self.connected = False тепер в _run_loop
-        logger.info(f"AsyncWS: Викликано _on_close.")
+        logger.info("AsyncWS: Викликано _on_close.")
+        if self.connected_event is not None:
+            self.connected_event.clear()
         # Можна додати надсилання події про закриття, якщо потрібно
 
 # END BLOCK 14
@@ -18,3 +18,10 @@ __all__ = [
     'StateManagerError'
 ]
 # END BLOCK 1
+
+# BLOCK 2: Event loop policy
+# Цикли asyncio, що створюються ядром бота (WebSocket, REST), працюють на uvloop, якщо він встановлений.
+# Політика встановлюється один раз при першому імпорті пакету, до створення циклів ядра.
+from modules.binance_integration import install_uvloop
+install_uvloop()
+# END BLOCK 2
@@ -0,0 +1,36 @@
+# modules/bot_core/_klines_numba.py
+
+# BLOCK 1: Imports
+import numpy as np
+# JIT-компіляція числової обробки Klines (опціонально, потребує numba)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+# END BLOCK 1
+
+# BLOCK 2: Klines numeric post-processing
+# Кількість перших колонок матриці, що мають бути скінченними (open, high, low, close)
+OHLC_COLUMNS = 4
+
+def _parse_klines(raw):
+    """
+    Приймає матрицю float64 (рядки - свічки, перші OHLC_COLUMNS колонок - open/high/low/close).
+    Повертає (values, valid_mask): ту ж матрицю та маску рядків зі скінченними OHLC.
+    Decimal тут не використовується - конвертацію робить викликач для валідних рядків.
+    """
+    rows = raw.shape[0]
+    valid_mask = np.ones(rows, dtype=np.bool_)
+    for i in range(rows):
+        for j in range(OHLC_COLUMNS):
+            if not np.isfinite(raw[i, j]):
+                valid_mask[i] = False
+                break
+    return raw, valid_mask
+
+# fastmath без прапорців nnan/ninf: інакше компілятор вважає, що NaN/inf не буває, і прибирає перевірку isfinite
+if njit is not None:
+    parse_klines = njit(cache=True, fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})(_parse_klines)
+else:
+    parse_klines = None
+# END BLOCK 2
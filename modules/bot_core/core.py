@@ -4,23 +4,27 @@
 
 # BLOCK 1: Imports and Class Definition Header
 import threading
+import functools
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait as wait_futures
+import weakref
 import queue
 import time
 import pandas as pd
-from decimal import Decimal, ROUND_DOWN, ROUND_UP, getcontext, DivisionByZero, InvalidOperation
+import numpy as np
+from decimal import Decimal, ROUND_DOWN, ROUND_UP, Context, localcontext, InvalidOperation
 import json
-from datetime import datetime, timezone, timedelta
-import os
-import shutil
-import inspect
+from datetime import datetime, timezone
 import copy
+from dataclasses import dataclass
+from typing import Optional
 import logging # Для WS debug
 from modules.config_manager import ConfigManager
-from modules.binance_integration import BinanceAPI, BinanceWebSocketHandler, BinanceAPIError
+from modules.binance_integration import BinanceAPI, BinanceWebSocketHandler, BinanceAPIError, to_decimal
 from modules.logger import logger
 from modules.strategies_tab import load_strategies
 # Імпортуємо StateManager з того ж пакету bot_core
 from .state_manager import StateManager, StateManagerError
+from ._klines_numba import parse_klines
 
 # Імпортуємо базову стратегію
 try:
@@ -30,8 +34,99 @@ except ImportError:
     class BaseStrategy: # Клас-заглушка
         pass
 
-# Встановлюємо точність Decimal (можна зробити один раз на рівні програми)
-getcontext().prec = 28
+# Точність Decimal для розрахунків BotCore за замовчуванням (глобальний контекст decimal не змінюється)
+DECIMAL_DEFAULT_PREC = 28
+
+
+def _in_decimal_context(method):
+    """Виконує метод BotCore у локальному контексті Decimal екземпляра (self._decimal_context)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with localcontext(self._decimal_context):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+# Константа для перерахунку відсотків у частки
+_DEC_100 = Decimal(100)
+
+# Внутрішня команда зупинки обробника команд (перевіряється за ідентичністю)
+_CMD_STOP_SENTINEL = {'type': 'STOP_INTERNAL'}
+
+# Призначення частини OCO за типом ордера Binance (інше - 'UNKNOWN_OCO')
+_OCO_PURPOSE = {'LIMIT_MAKER': 'TP', 'STOP_LOSS_LIMIT': 'SL'}
+# Статуси ордерів Binance, що вважаються активними
+_ACTIVE_ORDER_STATUSES = frozenset({'NEW', 'PARTIALLY_FILLED'})
+
+class _DaemonExecutor:
+    """
+    Мінімальний пул потоків-демонів з submit()/shutdown(), що повертає concurrent.futures.Future.
+    На відміну від ThreadPoolExecutor, потоки - демони (як окремі потоки ядра раніше):
+    завислий мережевий виклик не блокує вихід інтерпретатора.
+    """
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._work_queue = queue.SimpleQueue()
+        self._threads = []
+        self._idle_workers = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._is_shutdown = False
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Ставить fn(*args, **kwargs) в чергу; новий потік створюється, лише якщо немає вільного."""
+        with self._lock:
+            if self._is_shutdown:
+                raise RuntimeError("Пул BotCore вже закрито.")
+            future = Future()
+            self._work_queue.put((future, fn, args, kwargs))
+            if not self._idle_workers.acquire(blocking=False) and len(self._threads) < self._max_workers:
+                worker = threading.Thread(target=self._worker_loop, daemon=True,
+                                          name=f"{self._thread_name_prefix}_{len(self._threads)}")
+                self._threads.append(worker)
+                worker.start()
+        return future
+
+    def _worker_loop(self):
+        while True:
+            work_item = self._work_queue.get()
+            if work_item is None:
+                return
+            future, fn, args, kwargs = work_item
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as work_error:
+                    future.set_exception(work_error)
+                else:
+                    future.set_result(result)
+            work_item = future = None
+            self._idle_workers.release()
+
+    def shutdown(self, cancel_futures: bool = False):
+        """Забороняє нові задачі та завершує потоки після поточних задач (не чекає їх)."""
+        with self._lock:
+            self._is_shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        work_item = self._work_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if work_item is not None:
+                        work_item[0].cancel()
+            for _ in self._threads:
+                self._work_queue.put(None)
+
+@dataclass(slots=True)
+class SessionStats:
+    """Лічильники сесії. Суми - цілі в одиницях 1/BotCore.SESSION_STATS_SCALE."""
+    total_trades: int = 0
+    winning_trades: int = 0
+    losing_trades: int = 0
+    total_pnl: int = 0
+    total_commission: int = 0
+    total_profit: int = 0
+    total_loss: int = 0
 
 class BotCoreError(Exception): pass
 
@@ -40,16 +135,41 @@ class BotCore:
     Ядро торгового бота (після рефакторингу StateManager).
     Керує життєвим циклом, обробкою подій та команд, взаємодією компонентів.
     """
+    # Суми статистики сесії зберігаються цілими в одиницях 10^-SESSION_STATS_SCALE_DIGITS
+    SESSION_STATS_SCALE_DIGITS = 8
+    SESSION_STATS_SCALE = 10 ** SESSION_STATS_SCALE_DIGITS
+    # Позиції полів у рядку відповіді klines API (t,o,h,l,c,v,ct,qav,n,tbv,tqv,i); перші 4 - OHLC
+    KLINE_FIELD_POSITIONS = (
+        ('open', 1), ('high', 2), ('low', 3), ('close', 4), ('volume', 5),
+        ('quote_asset_volume', 7), ('num_trades', 8),
+        ('taker_base_vol', 9), ('taker_quote_vol', 10)
+    )
+    # Колонки кільцевого буфера свічок (у порядку KLINE_FIELD_POSITIONS)
+    KLINE_COLUMNS = [col_name for col_name, col_pos in KLINE_FIELD_POSITIONS]
+    # Позиція 'close' у рядку буфера
+    KLINE_CLOSE_INDEX = KLINE_COLUMNS.index('close')
+    # Нульовий баланс у відповіді Binance (рядок, 8 знаків після коми)
+    BALANCE_ZERO_STR = '0.00000000'
+    # Максимум записів у кеші статусів OCO (get_order_list)
+    OCO_STATUS_CACHE_MAX_ENTRIES = 16
+    # Кількість потоків спільного пулу фонових задач ядра
+    EXECUTOR_MAX_WORKERS = 4
+    # Скільки start() чекає фонову перевірку OCO (секунди)
+    OCO_STARTUP_CHECK_TIMEOUT = 15.0
+    # Спільний таймаут очікування незавершених розміщень OCO при зупинці (секунди)
+    OCO_PLACEMENT_STOP_TIMEOUT = 5.0
+    # Поля активного ордера OCO, зміна яких вимагає перезапису в StateManager
+    OCO_ORDER_DIRTY_FIELDS = ('status', 'quantity_req', 'price', 'stop_price')
 # END BLOCK 1
 # BLOCK 2: Core Initialization (__init__)
-    def __init__(self, config_manager: ConfigManager, command_queue: queue.Queue = None, event_queue: queue.Queue = None):
+    def __init__(self, config_manager: ConfigManager, command_queue: queue.SimpleQueue = None, event_queue: queue.Queue = None):
         logger.info("BotCore (Core): Ініціалізація...")
         self.config_manager = config_manager
         self.config = {} # Загальна конфігурація бота (завантажиться пізніше)
 
         # Ініціалізація черг
         if command_queue is None:
-            self.command_queue = queue.Queue()
+            self.command_queue = queue.SimpleQueue()
         else:
             self.command_queue = command_queue
         if event_queue is None:
@@ -81,18 +201,36 @@ class BotCore:
         self.base_asset = 'BTC'
         self.price_precision = 8
         self.qty_precision = 8
+        # Контекст Decimal для розрахунків цін і кількостей (точність оновлюється з symbol_info)
+        self._decimal_context = Context(prec=DECIMAL_DEFAULT_PREC)
         self.position_size_percent = Decimal('0.1') # Дефолт
         self.commission_taker = Decimal('0.00075') # Дефолт
         self.tp_percent = Decimal('0.01') # Дефолт
         self.sl_percent = Decimal('0.005') # Дефолт
+        self.kline_interval = '1m'
+        self.oco_status_cache_ttl = 3.0 # Секунди
+
+        # Кеш відповідей get_order_list: str(oco_id) -> (time.monotonic(), oco_info)
+        self._oco_status_cache = {}
+        self._oco_status_cache_lock = threading.Lock()
+        # Перевірка OCO не повинна виконуватись паралельно (інакше можливе подвійне розміщення OCO)
+        self._oco_restore_lock = threading.Lock()
+        # Спільний пул фонових задач ядра (початкові дані, перевірка та розміщення OCO); закривається в stop()
+        self._executor: _DaemonExecutor | None = None
+        # Незавершені розміщення OCO (stop() чекає їх зі спільним таймаутом)
+        self._pending_oco_futures = weakref.WeakSet()
+        # Встановлюється WS Handler при відкритті з'єднання (див. connected_event)
+        self._ws_connected_event = threading.Event()
+        # Встановлюється потоком обробника команд перед першим очікуванням команди
+        self._cmd_processor_ready = threading.Event()
 
         # Статистика сесії (залишається в Core)
         self.session_stats = self._reset_session_stats()
 
-        # Буфер даних Klines (залишається в Core)
+        # Кільцевий буфер Klines (залишається в Core), DataFrame будується через get_klines_df()
         # Доступ до нього має бути захищений локом StateManager
-        self.klines_buffer = pd.DataFrame()
         self.required_klines_length = 100 # Буде оновлено стратегією
+        self._clear_klines_ring(self.required_klines_length + 20)
         self.last_kline_update_time = 0
 
         # Виконуємо основну послідовність ініціалізації
@@ -141,19 +279,12 @@ class BotCore:
 # END BLOCK 2
 # BLOCK 3: Session Statistics Methods
     def _reset_session_stats(self):
-        """Скидає статистику поточної сесії."""
-        stats = {}
-        stats['total_trades'] = 0
-        stats['winning_trades'] = 0
-        stats['losing_trades'] = 0
-        stats['total_pnl'] = Decimal(0)
-        stats['total_commission'] = Decimal(0)
-        stats['win_rate'] = 0.0
-        stats['profit_factor'] = 0.0
-        stats['total_profit'] = Decimal(0)
-        stats['total_loss'] = Decimal(0)
-        stats['avg_profit'] = Decimal(0)
-        stats['avg_loss'] = Decimal(0)
+        """
+        Скидає статистику поточної сесії.
+        Суми (PnL, комісія, прибуток, збиток) зберігаються цілими числами в одиницях 1/SESSION_STATS_SCALE;
+        похідні метрики (win_rate, profit_factor, avg_*) розраховуються в get_session_stats().
+        """
+        stats = SessionStats()
         logger.debug("Статистику сесії скинуто.")
         return stats
 
@@ -169,84 +300,32 @@ class BotCore:
         # Отримуємо поточну статистику
         ss = self.session_stats
 
-        # Оновлюємо загальні лічильники
-        current_total_trades = ss.get('total_trades', 0)
-        ss['total_trades'] = current_total_trades + 1
-
-        current_total_pnl = ss.get('total_pnl', Decimal(0))
-        ss['total_pnl'] = current_total_pnl + pnl
-
-        current_total_commission = ss.get('total_commission', Decimal(0))
-        ss['total_commission'] = current_total_commission + commission
-
-        # Визначаємо результат угоди
-        is_win = pnl > 0
-        is_loss = pnl < 0
-
-        # Оновлюємо лічильники прибуткових/збиткових угод та сум
-        current_wins = ss.get('winning_trades', 0)
-        current_losses = ss.get('losing_trades', 0)
-        current_total_profit = ss.get('total_profit', Decimal(0))
-        current_total_loss = ss.get('total_loss', Decimal(0))
-
-        if is_win:
-            ss['winning_trades'] = current_wins + 1
-            ss['total_profit'] = current_total_profit + pnl
-        elif is_loss:
-            ss['losing_trades'] = current_losses + 1
+        # Decimal -> ціле в одиницях 1e-8 (scaleb лише зсуває експоненту), далі лише цілочисельні додавання
+        scale_digits = self.SESSION_STATS_SCALE_DIGITS
+        ss.total_trades += 1
+        if commission.is_finite():
+            ss.total_commission += int(commission.scaleb(scale_digits).to_integral_value(ROUND_DOWN))
+        else:
+            logger.warning("Stats: некоректна комісія угоди (%s) - не враховано.", commission)
+        if not pnl.is_finite():
+            logger.warning("Stats: некоректний PnL угоди (%s) - угоду не класифіковано.", pnl)
+            return
+        pnl_units = int(pnl.scaleb(scale_digits).to_integral_value(ROUND_DOWN))
+        ss.total_pnl += pnl_units
+
+        # Класифікація за точним (не округленим) PnL: ненульовий PnL менше 1e-8 - теж прибуток/збиток
+        if pnl > 0:
+            ss.winning_trades += 1
+            ss.total_profit += pnl_units
+        elif pnl < 0:
+            ss.losing_trades += 1
             # Додаємо АБСОЛЮТНЕ значення збитку
-            ss['total_loss'] = current_total_loss + abs(pnl)
-
-        # Перераховуємо похідні метрики
-        total_trades = ss['total_trades'] # Оновлене значення
-        wins = ss['winning_trades']       # Оновлене значення
-        losses = ss['losing_trades']     # Оновлене значення
-        total_profit = ss['total_profit'] # Оновлене значення
-        total_loss = ss['total_loss']     # Оновлене значення
-
-        # Розрахунок Win Rate
-        win_rate_val = 0.0
-        if total_trades > 0:
-            # Використовуємо Decimal для точності проміжних розрахунків
-            win_rate_decimal = (Decimal(wins) / Decimal(total_trades)) * Decimal(100)
-            # Конвертуємо в float для зберігання/відображення
-            win_rate_val = float(win_rate_decimal)
-        ss['win_rate'] = win_rate_val
-
-        # Розрахунок Profit Factor
-        profit_factor_val = 0.0
-        try:
-            if total_loss > 0:
-                # Використовуємо Decimal для точності ділення
-                profit_factor_decimal = total_profit / total_loss
-                # Конвертуємо в float
-                profit_factor_val = float(profit_factor_decimal)
-            elif total_profit > 0:
-                # Якщо збитків не було, але був прибуток -> нескінченність
-                profit_factor_val = float('inf')
-            # Інакше (прибуток=0, збиток=0) залишається 0.0
-        except DivisionByZero:
-            # Теоретично, перевірка total_loss > 0 має це покривати, але про всяк випадок
-             if total_profit > 0:
-                  profit_factor_val = float('inf')
-             # else profit_factor_val remains 0.0
-        ss['profit_factor'] = profit_factor_val
-
-        # Розрахунок Avg Profit
-        avg_profit_val = Decimal(0)
-        if wins > 0:
-             avg_profit_val = total_profit / Decimal(wins)
-        ss['avg_profit'] = avg_profit_val # Зберігаємо як Decimal
-
-        # Розрахунок Avg Loss
-        avg_loss_val = Decimal(0)
-        if losses > 0:
-             avg_loss_val = total_loss / Decimal(losses)
-        ss['avg_loss'] = avg_loss_val # Зберігаємо як Decimal
-
-        # Логування оновленої статистики
-        pnl_formatted = f"{ss['total_pnl']:.4f}" # Форматуємо для логу
-        logger.info(f"Stats Updated: Trades={total_trades}, Wins={wins}, Losses={losses}, PnL={pnl_formatted}")
+            ss.total_loss -= pnl_units
+
+        # Логування оновленої статистики (%-форматування лише якщо INFO увімкнено)
+        logger.info("Stats Updated: Trades=%d, Wins=%d, Losses=%d, PnL=%.4f",
+                    ss.total_trades, ss.winning_trades, ss.losing_trades,
+                    ss.total_pnl / self.SESSION_STATS_SCALE)
 # END BLOCK 3
 # BLOCK 4: Config and Component Initialization Methods
     def _load_bot_settings(self):
@@ -259,26 +338,26 @@ class BotCore:
         try:
             # --- Розмір позиції ---
             pos_size_conf = self.config.get('position_size_percent', 10.0)
-            pos_size_dec = Decimal(str(pos_size_conf))
-            pos_size_fraction = pos_size_dec / Decimal(100)
+            pos_size_dec = to_decimal(pos_size_conf)
+            pos_size_fraction = pos_size_dec / _DEC_100
             self.position_size_percent = pos_size_fraction
 
             # --- Комісія ---
             comm_taker_conf = self.config.get('commission_taker', 0.075)
-            comm_taker_dec = Decimal(str(comm_taker_conf))
-            comm_taker_fraction = comm_taker_dec / Decimal(100)
+            comm_taker_dec = to_decimal(comm_taker_conf)
+            comm_taker_fraction = comm_taker_dec / _DEC_100
             self.commission_taker = comm_taker_fraction
 
             # --- Take Profit ---
             tp_conf = self.config.get('take_profit_percent', 1.0)
-            tp_dec = Decimal(str(tp_conf))
-            tp_fraction = tp_dec / Decimal(100)
+            tp_dec = to_decimal(tp_conf)
+            tp_fraction = tp_dec / _DEC_100
             self.tp_percent = tp_fraction
 
             # --- Stop Loss ---
             sl_conf = self.config.get('stop_loss_percent', 0.5)
-            sl_dec = Decimal(str(sl_conf))
-            sl_fraction = sl_dec / Decimal(100)
+            sl_dec = to_decimal(sl_conf)
+            sl_fraction = sl_dec / _DEC_100
             self.sl_percent = sl_fraction
 
             # --- Символ ---
@@ -298,14 +377,19 @@ class BotCore:
 
             # --- Інтервал Klines ---
             kline_interval_conf = self.config.get('kline_interval', '1m')
-            # Зберігаємо в self.config, використовуємо при потребі через self.config.get()
+            # Зберігаємо як атрибут - решта коду не читає self.config повторно
+            self.kline_interval = str(kline_interval_conf)
+
+            # --- TTL кешу статусів OCO ---
+            oco_cache_ttl_conf = self.config.get('oco_status_cache_ttl', 3.0)
+            self.oco_status_cache_ttl = float(oco_cache_ttl_conf)
 
             # Логування завантажених параметрів
             pos_size_disp = self.position_size_percent * 100
             tp_disp = self.tp_percent * 100
             sl_disp = self.sl_percent * 100
 
-            log_msg_1 = f" Налаштування OK: Mode={self.active_mode}, Sym={self.symbol}, Strat={self.selected_strategy_name}, KlineInterval={kline_interval_conf}"
+            log_msg_1 = f" Налаштування OK: Mode={self.active_mode}, Sym={self.symbol}, Strat={self.selected_strategy_name}, KlineInterval={self.kline_interval}"
             logger.info(log_msg_1)
             log_msg_2 = f"  Trading Params: PosSize={pos_size_disp:.1f}%, TP={tp_disp:.2f}%, SL={sl_disp:.2f}%"
             logger.info(log_msg_2)
@@ -357,27 +441,15 @@ class BotCore:
         try:
             # Виконуємо запит
             exchange_info = api.get_exchange_info(symbol=current_symbol)
-            # Аналізуємо відповідь
-            symbols_data = None
-            symbols_list_exists = False
-            is_valid_response = False
-
-            if exchange_info is not None:
-                if 'symbols' in exchange_info:
-                    symbols_data = exchange_info['symbols']
-                    # Перевіряємо, що це список
-                    if isinstance(symbols_data, list):
-                         symbols_list_exists = True
-
-            # Перевіряємо, чи отримали список з одним елементом
-            if symbols_list_exists:
-                 list_len = len(symbols_data)
-                 if list_len == 1:
-                      is_valid_response = True
+            # Запит з symbol повертає рівно один запис у 'symbols' - беремо його напряму
+            try:
+                symbol_data = exchange_info['symbols'][0]
+                is_valid_response = symbol_data.get('symbol') == current_symbol
+            except (KeyError, IndexError, TypeError, AttributeError):
+                is_valid_response = False
 
             # Зберігаємо дані, якщо відповідь коректна
             if is_valid_response:
-                symbol_data = symbols_data[0]
                 self.symbol_info = symbol_data
                 # Визначаємо базовий та котирувальний активи
                 quote_asset_from_info = self.symbol_info.get('quoteAsset', 'USDT')
@@ -410,10 +482,12 @@ class BotCore:
                 self.price_precision = price_prec_int
                 self.qty_precision = qty_prec_int
 
-                # Оновлюємо глобальну точність Decimal
+                # Оновлюємо точність контексту Decimal екземпляра
                 # Беремо максимум з 28 (стандарт Decimal) та суми точностей + запас
-                new_decimal_prec = max(28, price_prec_int + qty_prec_int + 5)
-                getcontext().prec = new_decimal_prec
+                new_decimal_prec = max(DECIMAL_DEFAULT_PREC, price_prec_int + qty_prec_int + 5)
+                if self._decimal_context.prec != new_decimal_prec:
+                    # Новий об'єкт замість зміни наявного: потоки, що вже рахують, не бачать зміни посеред розрахунку
+                    self._decimal_context = Context(prec=new_decimal_prec)
 
                 logger.info(f"Встановлено точність: Ціна={self.price_precision}, К-сть={self.qty_precision}")
             except Exception as e:
@@ -469,14 +543,29 @@ class BotCore:
             # Якщо клас не знайдено
             logger.error(f"Клас стратегії '{strategy_name}' не знайдено в папці 'strategies'.")
             self.strategy = None
+
+    def reload_strategies(self):
+        """Скидає кеш load_strategies() і повторно завантажує обрану стратегію."""
+        load_strategies.cache_clear()
+        logger.info("Кеш стратегій очищено. Перезавантаження стратегії...")
+        self._load_strategy()
 # END BLOCK 4
 # BLOCK 5: Initial Data Fetching Methods (User's Version + Configurable Kline Interval)
     def _fetch_initial_data(self):
         """Завантажує початкові дані (баланс, свічки)."""
         logger.info("Завантаження початкових даних (баланс, свічки)...")
-        # Послідовно викликаємо методи для завантаження
-        self._fetch_initial_balance()
-        self._fetch_initial_klines() # Цей метод тепер використовуватиме конфіг
+        # Баланс і свічки - незалежні REST запити зі своїм станом, тому виконуємо їх паралельно
+        executor = self._get_executor()
+        fetch_futures = {
+            'баланс': executor.submit(self._fetch_initial_balance),
+            'свічки': executor.submit(self._fetch_initial_klines),
+        }
+        wait_futures(fetch_futures.values())
+        # Методи самі логують свої помилки; тут - лише непередбачені винятки
+        for fetch_name, fetch_future in fetch_futures.items():
+            fetch_error = fetch_future.exception()
+            if fetch_error is not None:
+                logger.error("Помилка паралельного завантаження (%s): %r", fetch_name, fetch_error)
         logger.debug("Завершено спробу завантаження початкових даних.")
 
     def _fetch_initial_balance(self):
@@ -503,42 +592,43 @@ class BotCore:
             if balances_key_exists:
                 # Якщо дані отримано коректно
                 new_balance_dict = {}
-                # Обробляємо кожен актив у відповіді
+                # Нульові баланси (Binance повертає сотні активів, майже всі - '0.00000000') пропускаємо
+                # порівнянням рядків, без створення Decimal
+                zero_str = self.BALANCE_ZERO_STR
                 for item in balances_data:
                     asset_name = item.get('asset')
                     free_str = item.get('free', '0') # Безпечний доступ
                     locked_str = item.get('locked', '0') # Безпечний доступ
                     # Обробляємо тільки якщо є назва активу
-                    if asset_name:
-                         try:
-                              # Конвертуємо рядки в Decimal
-                              free_bal = Decimal(free_str)
-                              locked_bal = Decimal(locked_str)
-                              # Перевіряємо, чи баланс ненульовий
-                              is_positive_balance = free_bal > 0 or locked_bal > 0
-                              if is_positive_balance:
-                                   # Додаємо до нового словника балансів
-                                   balance_entry = {'free': free_bal, 'locked': locked_bal}
-                                   new_balance_dict[asset_name] = balance_entry
-                         except InvalidOperation:
-                              # Логуємо помилку конвертації для конкретного активу
-                              logger.warning(f"Некоректне значення балансу для {asset_name}: free='{free_str}', locked='{locked_str}'")
+                    if not asset_name or (free_str == zero_str and locked_str == zero_str):
+                        continue
+                    try:
+                        # Конвертуємо рядки в Decimal
+                        free_bal = Decimal(free_str)
+                        locked_bal = Decimal(locked_str)
+                        # Перевіряємо, чи баланс ненульовий
+                        is_positive_balance = free_bal > 0 or locked_bal > 0
+                        if is_positive_balance:
+                            # Додаємо до нового словника балансів
+                            balance_entry = {'free': free_bal, 'locked': locked_bal}
+                            new_balance_dict[asset_name] = balance_entry
+                    except InvalidOperation:
+                        # Логуємо помилку конвертації для конкретного активу
+                        logger.warning("Некоректне значення балансу для %s: free='%s', locked='%s'", asset_name, free_str, locked_str)
 
                 # Встановлюємо новий стан балансів через StateManager (потокобезпечно)
                 self.state_manager.set_balances(new_balance_dict)
 
-                # Логуємо основний баланс (зчитуємо оновлений стан)
-                current_balances = self.state_manager.get_balances()
-                quote_balance_data = current_balances.get(self.quote_asset, {})
-                free_quote_bal = quote_balance_data.get('free', Decimal(0))
-                quote_balance_str = f"{free_quote_bal:.8f}" # Форматуємо для логу
-                logger.info(f"Баланси успішно завантажено та оновлено. {self.quote_asset}: {quote_balance_str}")
+                # Логуємо основний баланс (з щойно встановленого словника, без копії стану)
+                quote_balance_data = new_balance_dict.get(self.quote_asset, {})
+                free_quote_bal = quote_balance_data.get('free', 0)
+                logger.info("Баланси успішно завантажено та оновлено. %s: %s", self.quote_asset, free_quote_bal)
             else:
                 # Якщо відповідь API некоректна
                 logger.error("Не отримано коректну інформацію про баланси з API.")
         except Exception as e:
             # Якщо виникла будь-яка інша помилка
-            logger.error(f"Помилка отримання початкових балансів: {e}", exc_info=True)
+            logger.error("Помилка отримання початкових балансів: %s", e, exc_info=True)
 
     def _fetch_initial_klines(self):
         """Завантажує початкову історію свічок та зберігає у буфер."""
@@ -549,10 +639,9 @@ class BotCore:
         if not api_ready: logger.error("API не готове для завантаження Klines."); return
         if not strategy_ready: logger.error("Стратегія не готова для визначення довжини Klines."); return
 
-        # <<< ЗМІНА: Читаємо інтервал з self.config >>>
-        kline_interval = self.config.get('kline_interval', '1m')
-        logger.info(f"_fetch_initial_klines: Використання інтервалу {kline_interval}")
-        # <<< КІНЕЦЬ ЗМІНИ >>>
+        # Інтервал вже прочитано з конфігу в _load_bot_settings
+        kline_interval = self.kline_interval
+        logger.info("_fetch_initial_klines: Використання інтервалу %s", kline_interval)
 
         # Визначаємо ліміт
         limit = self.required_klines_length + 20
@@ -576,74 +665,159 @@ class BotCore:
 
             # Якщо отримали достатньо даних
             if enough_klines:
-                # Створюємо DataFrame
-                cols_api = ['t','o','h','l','c','v','ct','qav','n','tbv','tqv','i']
-                # Беремо тільки ті колонки, що реально прийшли
-                actual_cols = cols_api[:len(klines_data[0])]
-                df = pd.DataFrame(klines_data, columns=actual_cols)
-                # Перейменовуємо колонки
-                column_mapping = {
-                    't':'timestamp', 'o':'open', 'h':'high', 'l':'low', 'c':'close',
-                    'v':'volume', 'n':'num_trades', 'qav':'quote_asset_volume',
-                    'tbv':'taker_base_vol', 'tqv':'taker_quote_vol'
-                }
-                df.rename(columns=column_mapping, inplace=True)
-
-                # Обробляємо timestamp
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
-                df.set_index('timestamp', inplace=True)
-
-                # Конвертуємо числові колонки в Decimal
-                num_cols_to_convert = [
-                    'open','high','low','close','volume','quote_asset_volume',
-                    'num_trades','taker_base_vol','taker_quote_vol'
-                ]
-                for col_name in num_cols_to_convert:
-                    if col_name in df.columns:
-                        col_data = df[col_name]
-                        # Функція для безпечної конвертації
-                        def safe_to_decimal_kline(x):
-                            if pd.notna(x):
-                                try: return Decimal(str(x))
-                                except InvalidOperation: return Decimal('NaN')
-                            else: return Decimal('NaN')
-                        # Застосовуємо конвертацію
-                        converted_col = pd.to_numeric(col_data, errors='coerce').apply(safe_to_decimal_kline)
-                        df[col_name] = converted_col
-
-                # Видаляємо рядки з NaN в основних цінових колонках
-                df.dropna(subset=['open','high','low','close'], inplace=True)
-
-                # Зберігаємо результат у буфер під блокуванням StateManager
-                with self.state_manager.lock:
-                    # Беремо останні N рядків, що залишились
-                    final_df_slice = df.iloc[-limit:]
-                    self.klines_buffer = final_df_slice
-                    # Перевіряємо, чи буфер не порожній
-                    buffer_is_empty = self.klines_buffer.empty
-                    if not buffer_is_empty:
-                        # Оновлюємо час останнього оновлення
-                        last_timestamp_in_buffer = self.klines_buffer.index[-1]
-                        self.last_kline_update_time = last_timestamp_in_buffer.value // 10**6
-                        buffer_len = len(self.klines_buffer)
-                        logger.info(f"Збережено {buffer_len} початкових свічок у буфер.")
-                    else:
-                        logger.error("Буфер Klines порожній після видалення NaN.")
+                # Відповідь API як 2D масив (рядки - свічки)
+                raw_klines = np.asarray(klines_data, dtype=object)
+                # Беремо тільки ті колонки, що реально прийшли (визначаємо один раз за шириною рядка)
+                row_width = raw_klines.shape[1]
+                float_fields = [(col_name, col_pos) for col_name, col_pos in self.KLINE_FIELD_POSITIONS if col_pos < row_width]
+                # Один векторний розбір у float64 в спільну матрицю
+                present_block = raw_klines[:, [col_pos for col_name, col_pos in float_fields]]
+                float_matrix = np.empty(present_block.shape, dtype=np.float64)
+                for col_idx in range(present_block.shape[1]):
+                    float_matrix[:, col_idx] = pd.to_numeric(present_block[:, col_idx], errors='coerce')
+                # Маска рядків зі скінченними OHLC (JIT через numba, якщо встановлено)
+                if parse_klines is not None:
+                    float_matrix, valid_mask = parse_klines(float_matrix)
+                else:
+                    valid_mask = np.isfinite(float_matrix[:, :4]).all(axis=1)
+                # Відкидаємо рядки з NaN/inf в основних цінових колонках; лишаємо не більше limit останніх
+                float_matrix = float_matrix[valid_mask][-limit:]
+                open_times_ms = raw_klines[valid_mask, 0].astype(np.int64)[-limit:]
+                kept_count = len(open_times_ms)
+
+                # Заповнюємо новий кільцевий буфер поза блокуванням (float64 копіюється блоком, відсутні колонки лишаються NaN)
+                ring, ring_ts = self._new_klines_ring(limit)
+                ring_ts[:kept_count] = open_times_ms
+                ring_col_indices = [self.KLINE_COLUMNS.index(col_name) for col_name, col_pos in float_fields]
+                ring[:kept_count, ring_col_indices] = float_matrix
+
+                # Під блокуванням StateManager лише підміняємо посилання на буфер
+                if kept_count > 0:
+                    last_ts_ms = int(open_times_ms[-1])
+                    with self.state_manager.lock:
+                        self._klines_ring, self._klines_ts = ring, ring_ts
+                        self._klines_head = kept_count % limit
+                        self._klines_count = kept_count
+                        self.last_kline_update_time = last_ts_ms
+                    logger.info("Збережено %d початкових свічок у буфер.", kept_count)
+                else:
+                    with self.state_manager.lock:
+                        self._clear_klines_ring(limit)
+                    logger.error("Буфер Klines порожній після видалення NaN.")
             else:
                 # Якщо отримали недостатньо свічок
-                logger.error(f"Не завантажено достатньо ({received_count}/{limit}) свічок для інтервалу {kline_interval}.")
+                logger.error("Не завантажено достатньо (%d/%d) свічок для інтервалу %s.", received_count, limit, kline_interval)
                 # Очищаємо буфер
                 with self.state_manager.lock:
-                     self.klines_buffer = pd.DataFrame()
+                     self._clear_klines_ring(limit)
         except Exception as e:
             # Обробляємо будь-які помилки
-            logger.error(f"Помилка завантаження/обробки початкових Klines: {e}", exc_info=True)
+            logger.error("Помилка завантаження/обробки початкових Klines: %s", e, exc_info=True)
             # Очищаємо буфер у разі помилки
             with self.state_manager.lock:
-                 self.klines_buffer = pd.DataFrame()
+                 self._clear_klines_ring(limit)
+
+    # --- Кільцевий буфер Klines ---
+    # Значення свічок (float64, колонки KLINE_COLUMNS) лежать у масиві фіксованого розміру, часи відкриття (int64, мс) -
+    # в окремому масиві; _klines_head - слот наступного запису. Усі методи нижче викликаються під self.state_manager.lock.
+    def _new_klines_ring(self, capacity: int):
+        """Повертає нові масиви кільцевого буфера: (значення свічок float64, часи відкриття в мс)."""
+        ring = np.full((capacity, len(self.KLINE_COLUMNS)), np.nan, dtype=np.float64)
+        ring_ts = np.zeros(capacity, dtype=np.int64)
+        return ring, ring_ts
+
+    def _clear_klines_ring(self, capacity: int):
+        """Замінює буфер порожнім кільцем на capacity свічок."""
+        self._klines_ring, self._klines_ts = self._new_klines_ring(capacity)
+        self._klines_head = 0
+        self._klines_count = 0
+
+    def _klines_ring_positions(self, n: Optional[int] = None) -> np.ndarray:
+        """Індекси слотів останніх n свічок (усіх, якщо None) у хронологічному порядку."""
+        count = self._klines_count
+        if n is None or n > count:
+            n = count
+        capacity = len(self._klines_ts)
+        start = (self._klines_head - n) % capacity
+        return (start + np.arange(n)) % capacity
+
+    def _resize_klines_ring(self, capacity: int):
+        """Змінює місткість буфера, зберігаючи останні свічки."""
+        positions = self._klines_ring_positions(capacity)
+        kept_count = len(positions)
+        ring, ring_ts = self._new_klines_ring(capacity)
+        ring[:kept_count] = self._klines_ring[positions]
+        ring_ts[:kept_count] = self._klines_ts[positions]
+        self._klines_ring, self._klines_ts = ring, ring_ts
+        self._klines_head = kept_count % capacity
+        self._klines_count = kept_count
+
+    def _append_kline_to_ring(self, open_time_ms: int, row_values: tuple) -> bool:
+        """
+        Записує закриту свічку в буфер. Нова (найпізніша) свічка пишеться в слот без перевиділення пам'яті.
+        Свічка з уже наявним часом відкриття перезаписує свій слот; свічка не по порядку вставляється
+        на своє місце за часом. Повертає False лише для свічки, старішої за весь заповнений буфер.
+        """
+        ring_ts = self._klines_ts
+        capacity = len(ring_ts)
+        count = self._klines_count
+        if count and open_time_ms <= ring_ts[(self._klines_head - 1) % capacity]:
+            positions = self._klines_ring_positions()
+            ordered_ts = ring_ts[positions]
+            insert_at = int(np.searchsorted(ordered_ts, open_time_ms))
+            if ordered_ts[insert_at] == open_time_ms:
+                self._klines_ring[positions[insert_at]] = row_values
+                return True
+            if insert_at == 0 and count == capacity:
+                return False
+            # Рідкісний випадок: перебудовуємо буфер у хронологічному порядку зі вставленою свічкою
+            ordered_rows = np.insert(self._klines_ring[positions], insert_at, row_values, axis=0)[-capacity:]
+            ordered_ts = np.insert(ordered_ts, insert_at, open_time_ms)[-capacity:]
+            kept_count = len(ordered_ts)
+            self._klines_ring[:kept_count] = ordered_rows
+            ring_ts[:kept_count] = ordered_ts
+            self._klines_head = kept_count % capacity
+            self._klines_count = kept_count
+            return True
+        head = self._klines_head
+        self._klines_ring[head] = row_values
+        ring_ts[head] = open_time_ms
+        self._klines_head = (head + 1) % capacity
+        if count < capacity:
+            self._klines_count = count + 1
+        return True
+
+    def get_klines_df(self, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Повертає новий DataFrame з останніх n свічок буфера (усіх, якщо None).
+        Колонки KLINE_COLUMNS (float64), індекс - DatetimeIndex 'timestamp' (UTC).
+        Будується лише на вимогу (для стратегії); викликати під self.state_manager.lock.
+        """
+        positions = self._klines_ring_positions(n)
+        kline_index = pd.DatetimeIndex(pd.to_datetime(self._klines_ts[positions], unit='ms', utc=True), name='timestamp')
+        return pd.DataFrame(self._klines_ring[positions], columns=self.KLINE_COLUMNS, index=kline_index)
+
+    def _last_kline_close(self) -> Optional[Decimal]:
+        """Ціна закриття останньої свічки буфера як Decimal (None, якщо буфер порожній або ціна NaN)."""
+        if not self._klines_count:
+            return None
+        close_value = self._klines_ring[(self._klines_head - 1) % len(self._klines_ts), self.KLINE_CLOSE_INDEX]
+        if close_value != close_value: # NaN
+            return None
+        return to_decimal(float(close_value))
 # END BLOCK 5
 # BLOCK 6: OCO Check and Restore Method (Using get_order_list - NameError Fix)
     def _check_and_restore_oco(self):
+        """Запускає перевірку OCO, якщо вона ще не виконується в іншому потоці."""
+        if not self._oco_restore_lock.acquire(blocking=False):
+            logger.info("_check_and_restore_oco: Перевірка OCO вже виконується. Пропуск.")
+            return
+        try:
+            self._check_and_restore_oco_locked()
+        finally:
+            self._oco_restore_lock.release()
+
+    def _check_and_restore_oco_locked(self):
         """
         Перевіряє OCO для існуючої позиції (з StateManager)
         та розміщує новий, якщо потрібно. Додає знайдені активні частини
@@ -658,12 +832,11 @@ class BotCore:
             logger.debug("_check_and_restore_oco: Відкритих позицій немає для перевірки OCO.")
             return # Виходимо, якщо немає позиції
 
-        # Крок 3: Отримуємо дані позиції
-        pos_symbol = pos.get('symbol')
-        pos_qty = pos.get('quantity')
-        pos_entry_price = pos.get('entry_price')
-        # Отримуємо збережений ID OCO (це може бути listClientOrderId або orderListId)
-        oco_id = pos.get('oco_list_id')
+        # Крок 3: Отримуємо дані позиції одним проходом
+        # oco_list_id - збережений ID OCO (це може бути listClientOrderId або orderListId)
+        pos_symbol, pos_qty, pos_entry_price, oco_id = (pos.get(k) for k in ('symbol', 'quantity', 'entry_price', 'oco_list_id'))
+        # Рядок ID для логів і ключа кешу рахуємо один раз
+        oco_id_str = "" if oco_id is None else str(oco_id)
 
         # Перевіряємо критичні дані позиції
         has_symbol = pos_symbol is not None
@@ -688,66 +861,56 @@ class BotCore:
         found_active_oco = False # Прапорець знайденого активного OCO
         api_error_occurred = False # Прапорець помилки API під час перевірки
 
-        # Перевіряємо, чи є ID для запиту
-        oco_id_is_valid = False
-        if oco_id is not None:
-             if oco_id != -1: # -1 стандартне значення Binance
-                  oco_id_str_check = str(oco_id).strip()
-                  if oco_id_str_check != "": # Перевірка на порожній рядок
-                       oco_id_is_valid = True
+        # Визначаємо параметр запиту за типом ID (None - ID невалідний)
+        oco_query_key, oco_query_value = self._classify_oco_id(oco_id)
+        oco_id_is_valid = oco_query_key is not None
+
+        # Зміни стану накопичуємо локально й застосовуємо одним кроком після перевірки
+        position_patch = {} # Поля відкритої позиції
+        active_orders_batch = {} # internal_id -> дані активного ордера
+        pending_events = [] # Події надсилаються після застосування змін стану (слухачі бачать уже оновлений стан)
 
         # Крок 5: Якщо є валідний OCO ID, перевіряємо його статус на біржі
         if oco_id_is_valid:
-            oco_id_log_str = str(oco_id) # Використовуємо цю змінну для логування
-            logger.info(f"_check_and_restore_oco: Позиція {pos_symbol} має OCO ID: {oco_id_log_str}. Запит статусу списку...")
+            logger.info(f"_check_and_restore_oco: Позиція {pos_symbol} має OCO ID: {oco_id_str}. Запит статусу списку...")
             try:
-                # Готуємо параметри запиту get_order_list
-                query_params = {}
-                # Пріоритетно шукаємо за listClientOrderId, якщо він схожий на наш
-                if oco_id_log_str.startswith("bot_"):
-                    query_params['listClientOrderId'] = oco_id_log_str
-                elif oco_id_log_str.isdigit(): # Якщо це число, припускаємо, що це orderListId
-                    query_params['orderListId'] = int(oco_id_log_str)
-                else: # Якщо це інший рядок, спробуємо як origClientOrderId (або listClientOrderId)
-                     # Binance API дозволяє використовувати origClientOrderId замість listClientOrderId
-                     query_params['origClientOrderId'] = oco_id_log_str # Спробуємо так
-
-                # Перевіряємо, чи вдалося сформувати параметри
-                if not query_params:
-                     id_query_error = ValueError(f"Не вдалося визначити тип ID для запиту OCO: {oco_id_log_str}")
-                     raise id_query_error
-
-                # Викликаємо новий метод API
-                oco_info = self.binance_api.get_order_list(**query_params)
+                # Параметри запиту get_order_list
+                query_params = {oco_query_key: oco_query_value}
+
+                # Викликаємо API (повторні перевірки в межах TTL беруть відповідь з кешу)
+                oco_info = self._get_order_list_cached(oco_id_str, query_params)
 
                 # --- Аналізуємо відповідь ---
                 if oco_info is None:
                     # Помилка API при запиті статусу OCO
-                    logger.error(f"_check_and_restore_oco: Помилка API при запиті статусу OCO ID: {oco_id_log_str}.")
+                    logger.error(f"_check_and_restore_oco: Помилка API при запиті статусу OCO ID: {oco_id_str}.")
                     api_error_occurred = True
                     found_active_oco = True # Вважаємо активним, щоб не ставити новий
 
                 elif isinstance(oco_info, dict) and not oco_info:
                     # API повернуло порожній словник - OCO не знайдено
-                    logger.warning(f"_check_and_restore_oco: OCO ордер з ID {oco_id_log_str} не знайдено на біржі.")
+                    logger.warning(f"_check_and_restore_oco: OCO ордер з ID {oco_id_str} не знайдено на біржі.")
                     found_active_oco = False # Активного OCO немає
+                    self._invalidate_oco_status(oco_id_str)
                     # Очищаємо OCO ID у позиції
-                    self.state_manager.update_open_position_field('oco_list_id', None)
+                    position_patch['oco_list_id'] = None
 
                 elif isinstance(oco_info, dict) and 'listOrderStatus' in oco_info:
                     # Отримали інформацію про OCO
                     oco_status = oco_info.get('listOrderStatus')
-                    logger.info(f"_check_and_restore_oco: Статус OCO списку {oco_id_log_str}: {oco_status}")
+                    logger.info(f"_check_and_restore_oco: Статус OCO списку {oco_id_str}: {oco_status}")
 
                     if oco_status == 'EXECUTING':
-                        logger.info(f"_check_and_restore_oco: OCO {oco_id_log_str} активний. Оновлення стану активних ордерів...")
+                        logger.info(f"_check_and_restore_oco: OCO {oco_id_str} активний. Оновлення стану активних ордерів...")
                         found_active_oco = True
                         orders_in_list = oco_info.get('orders', [])
                         active_orders_found_count = 0
+                        # Знімок збережених ордерів - щоб не перезаписувати ті, що не змінилися
+                        stored_active_orders = self.state_manager.get_all_active_orders() or {}
                         # Оновлюємо або додаємо активні частини OCO в StateManager
                         for order_data in orders_in_list:
                             order_status = order_data.get('status')
-                            is_order_active = order_status in ['NEW', 'PARTIALLY_FILLED']
+                            is_order_active = order_status in _ACTIVE_ORDER_STATUSES
                             if is_order_active:
                                 client_order_id = order_data.get('clientOrderId')
                                 binance_order_id = order_data.get('orderId')
@@ -758,7 +921,7 @@ class BotCore:
                                 if not is_our_cid: internal_id = binance_order_id
 
                                 if internal_id:
-                                    purpose = 'TP' if order_type == 'LIMIT_MAKER' else ('SL' if order_type == 'STOP_LOSS_LIMIT' else 'UNKNOWN_OCO')
+                                    purpose = _OCO_PURPOSE.get(order_type, 'UNKNOWN_OCO')
                                     order_symbol = order_data.get('symbol')
                                     order_side = order_data.get('side')
                                     orig_qty_str = order_data.get('origQty', '0')
@@ -771,34 +934,43 @@ class BotCore:
                                         'symbol': order_symbol, 'order_id_binance': binance_order_id,
                                         'client_order_id': client_order_id, 'list_client_order_id': list_cid_from_resp,
                                         'order_list_id_binance': list_id_from_resp, 'side': order_side,
-                                        'type': order_type, 'quantity_req': Decimal(orig_qty_str),
-                                        'price': Decimal(price_str), 'stop_price': Decimal(stop_price_str),
+                                        'type': order_type, 'quantity_req': to_decimal(orig_qty_str),
+                                        'price': to_decimal(price_str), 'stop_price': to_decimal(stop_price_str),
                                         'status': order_status, 'purpose': purpose
                                     }
-                                    self.state_manager.add_or_update_active_order(internal_id, active_order_details)
-                                    logger.debug(f"_check_and_restore_oco: Оновлено активний ордер {internal_id} ({purpose}) зі статусом {order_status}")
+                                    stored_order = stored_active_orders.get(internal_id)
+                                    is_unchanged = stored_order is not None and all(
+                                        stored_order.get(k) == active_order_details[k] for k in self.OCO_ORDER_DIRTY_FIELDS
+                                    )
+                                    if is_unchanged:
+                                        logger.debug(f"_check_and_restore_oco: Активний ордер {internal_id} ({purpose}) не змінився, оновлення пропущено")
+                                    else:
+                                        active_orders_batch[internal_id] = active_order_details
+                                        logger.debug(f"_check_and_restore_oco: Активний ордер {internal_id} ({purpose}) зі статусом {order_status} додано до пакета оновлень")
                                     active_orders_found_count = active_orders_found_count + 1
                                 else:
                                      logger.warning(f"_check_and_restore_oco: Не вдалося визначити internal_id для ордера {binance_order_id}")
-                        logger.info(f"_check_and_restore_oco: Знайдено {active_orders_found_count} активних ордерів у OCO списку {oco_id_log_str}.")
+                        logger.info(f"_check_and_restore_oco: Знайдено {active_orders_found_count} активних ордерів у OCO списку {oco_id_str}.")
                         # Переконуємось, що знайдено хоча б один, якщо статус EXECUTING
                         if active_orders_found_count == 0:
-                             logger.warning(f"Статус OCO {oco_id_log_str} = EXECUTING, але не знайдено активних ордерів у списку orders!")
+                             logger.warning(f"Статус OCO {oco_id_str} = EXECUTING, але не знайдено активних ордерів у списку orders!")
                              # Можливо, варто вважати, що OCO неактивний?
                              # found_active_oco = False # Поки що залишаємо True, як заявлено статусом списку
 
                     elif oco_status in ['ALL_DONE', 'REJECT']:
-                        logger.critical(f"_check_and_restore_oco: OCO {oco_id_log_str} має статус {oco_status}, але позиція {pos_symbol} все ще відкрита!")
-                        self.state_manager.update_open_position_field('oco_list_id', None)
+                        logger.critical(f"_check_and_restore_oco: OCO {oco_id_str} має статус {oco_status}, але позиція {pos_symbol} все ще відкрита!")
+                        self._invalidate_oco_status(oco_id_str)
+                        position_patch['oco_list_id'] = None
                         found_active_oco = False # OCO не активний
-                        critical_msg = f"КРИТИЧНО: OCO {oco_id_log_str} статус {oco_status}, але позиція {pos_symbol} відкрита!"
+                        critical_msg = f"КРИТИЧНО: OCO {oco_id_str} статус {oco_status}, але позиція {pos_symbol} відкрита!"
                         critical_payload = {'source':'BotCore._check_and_restore_oco', 'message': critical_msg}
-                        self._put_event({'type':'CRITICAL_ERROR', 'payload': critical_payload})
+                        pending_events.append({'type':'CRITICAL_ERROR', 'payload': critical_payload})
                         # Розглянути аварійний вихід тут?
 
                     else: # Інші статуси (EXPIRED тощо)
-                        logger.warning(f"_check_and_restore_oco: OCO {oco_id_log_str} має неочікуваний статус: {oco_status}. Вважаємо неактивним.")
-                        self.state_manager.update_open_position_field('oco_list_id', None)
+                        logger.warning(f"_check_and_restore_oco: OCO {oco_id_str} має неочікуваний статус: {oco_status}. Вважаємо неактивним.")
+                        self._invalidate_oco_status(oco_id_str)
+                        position_patch['oco_list_id'] = None
                         found_active_oco = False
 
                 else: # Якщо відповідь API мала несподіваний формат
@@ -814,7 +986,12 @@ class BotCore:
                 found_active_oco = True # Не розміщуємо новий OCO
                 error_message_oco_check = f"Загальна помилка перевірки/відновлення OCO: {e}"
                 error_payload_check = {'source':'BotCore._check_and_restore_oco', 'message': error_message_oco_check}
-                self._put_event({'type':'CRITICAL_ERROR', 'payload': error_payload_check})
+                pending_events.append({'type':'CRITICAL_ERROR', 'payload': error_payload_check})
+
+        # Застосовуємо накопичені зміни стану (і при частковій обробці до помилки), потім надсилаємо події
+        self._apply_oco_restore_updates(position_patch, active_orders_batch)
+        for pending_event in pending_events:
+            self._put_event(pending_event)
 
         # --- Крок 6: Розміщуємо новий OCO, якщо потрібно ---
         should_place_new_oco = False
@@ -829,23 +1006,90 @@ class BotCore:
                   should_place_new_oco = True
 
         if should_place_new_oco:
-            reason_log = "немає валідного OCO ID" if not oco_id_is_valid else f"активних частин OCO {str(oco_id)} не знайдено" # Використовуємо str(oco_id)
+            reason_log = "немає валідного OCO ID" if not oco_id_is_valid else f"активних частин OCO {oco_id_str} не знайдено"
             logger.warning(f"_check_and_restore_oco: Позиція існує, але {reason_log}. Розміщення нового OCO...")
-            # Запускаємо розміщення нового OCO в окремому потоці
-            oco_thread_name_missing = f"OCOPlaceOnRestore-{pos_symbol}"
-            oco_thread_missing = threading.Thread(
-                target=self._place_oco_order,
-                args=(pos_symbol, pos_qty, pos_entry_price),
-                daemon=True,
-                name=oco_thread_name_missing
-            )
-            oco_thread_missing.start()
+            # Запускаємо розміщення нового OCO у пулі OCO
+            self._submit_oco_placement(pos_symbol, pos_qty, pos_entry_price)
         # Логуємо завершення перевірки, якщо не було розміщення нового ордера
         elif not api_error_occurred and found_active_oco:
-             oco_id_log_final = str(oco_id) # Використовуємо str(oco_id)
-             logger.info(f"_check_and_restore_oco: Перевірка OCO завершена. Активний OCO ({oco_id_log_final}) існує.")
+             logger.info(f"_check_and_restore_oco: Перевірка OCO завершена. Активний OCO ({oco_id_str}) існує.")
         elif api_error_occurred:
              logger.error("_check_and_restore_oco: Перевірку OCO завершено з помилкою API. Новий OCO не розміщено.")
+
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _classify_oco_id(oco_id) -> tuple:
+        """
+        Визначає параметр запиту get_order_list для збереженого OCO ID.
+        Повертає (ім'я параметра, значення) або (None, None), якщо ID невалідний (None, -1, порожній).
+        """
+        if oco_id is None or oco_id == -1: # -1 стандартне значення Binance
+            return None, None
+        oco_id_str = str(oco_id)
+        if not oco_id_str.strip():
+            return None, None
+        # Пріоритетно шукаємо за listClientOrderId, якщо він схожий на наш
+        if oco_id_str.startswith("bot_"):
+            return 'listClientOrderId', oco_id_str
+        # Якщо це число, припускаємо, що це orderListId
+        if oco_id_str.isdigit():
+            return 'orderListId', int(oco_id_str)
+        # Інший рядок: Binance API дозволяє origClientOrderId замість listClientOrderId
+        return 'origClientOrderId', oco_id_str
+
+    def _get_executor(self) -> _DaemonExecutor:
+        """Спільний пул фонових задач ядра (створюється заново після stop())."""
+        if self._executor is None:
+            self._executor = _DaemonExecutor(max_workers=self.EXECUTOR_MAX_WORKERS, thread_name_prefix='BotCoreWorker')
+        return self._executor
+
+    def _submit_oco_placement(self, symbol: str, quantity: Decimal, entry_price: Decimal):
+        """Ставить _place_oco_order у спільний пул ядра."""
+        oco_future = self._get_executor().submit(self._place_oco_order, symbol, quantity, entry_price)
+        self._pending_oco_futures.add(oco_future)
+        return oco_future
+
+    def _apply_oco_restore_updates(self, position_patch: dict, active_orders_batch: dict):
+        """Застосовує зміни, зібрані _check_and_restore_oco, до StateManager в одному місці."""
+        if not position_patch and not active_orders_batch:
+            return
+        for field_name, field_value in position_patch.items():
+            self.state_manager.update_open_position_field(field_name, field_value)
+        for internal_id, order_details in active_orders_batch.items():
+            self.state_manager.add_or_update_active_order(internal_id, order_details)
+        logger.debug("_check_and_restore_oco: Застосовано %d полів позиції та %d активних ордерів.", len(position_patch), len(active_orders_batch))
+
+    def _get_order_list_cached(self, oco_key: str, query_params: dict):
+        """
+        Повертає статус OCO списку через get_order_list з коротким TTL-кешем по oco_key.
+        Кешуються лише відповіді зі статусом списку; помилки API та "не знайдено" не кешуються.
+        """
+        now = time.monotonic()
+        with self._oco_status_cache_lock:
+            cached_entry = self._oco_status_cache.get(oco_key)
+            if cached_entry is not None:
+                cached_at, cached_info = cached_entry
+                if now - cached_at < self.oco_status_cache_ttl:
+                    logger.debug("_get_order_list_cached: Статус OCO %s взято з кешу.", oco_key)
+                    return cached_info
+                # Запис застарів
+                del self._oco_status_cache[oco_key]
+
+        oco_info = self.binance_api.get_order_list(**query_params)
+
+        if isinstance(oco_info, dict) and 'listOrderStatus' in oco_info:
+            with self._oco_status_cache_lock:
+                # Обмежуємо розмір кешу: витісняємо найстаріший запис
+                if oco_key not in self._oco_status_cache and len(self._oco_status_cache) >= self.OCO_STATUS_CACHE_MAX_ENTRIES:
+                    oldest_key = min(self._oco_status_cache, key=lambda cache_key: self._oco_status_cache[cache_key][0])
+                    del self._oco_status_cache[oldest_key]
+                self._oco_status_cache[oco_key] = (time.monotonic(), oco_info)
+        return oco_info
+
+    def _invalidate_oco_status(self, oco_key: str):
+        """Видаляє статус OCO з кешу (список завершено або не знайдено)."""
+        with self._oco_status_cache_lock:
+            self._oco_status_cache.pop(oco_key, None)
 # END BLOCK 6
 # BLOCK 6.5: Lifecycle Methods (start, stop) - !! Corrected Ternary Operators + Config Kline Interval !!
     def start(self):
@@ -870,6 +1114,7 @@ class BotCore:
             return
 
         logger.info(f"=== СПРОБА ЗАПУСКУ BotCore {self.symbol}... ===")
+        oco_check_future = None # Фонова перевірка OCO (крок 3)
         try:
             # Крок 1: Перезавантаження налаштувань та перевірка/ініціалізація API
             logger.debug("start(): Перевірка/оновлення налаштувань та API...")
@@ -919,11 +1164,11 @@ class BotCore:
             self.session_stats = self._reset_session_stats() # Скидаємо статистику при старті
             logger.debug("start(): Початкові дані завантажено (або спроба зроблена).")
 
-            # Крок 3: Перевірка відкритої позиції та OCO
+            # Крок 3: Перевірка відкритої позиції та OCO (у фоні, паралельно з кроками 4-7)
             pos_to_check = self.state_manager.get_open_position() # Отримуємо з StateManager
             if pos_to_check:
                 logger.warning(f"start(): Запуск з ВІДКРИТОЮ позицією! Перевірка OCO...")
-                self._check_and_restore_oco() # Цей метод теж використовує StateManager
+                oco_check_future = self._get_executor().submit(self._check_and_restore_oco)
             else:
                 logger.debug("start(): Відкритих позицій для перевірки OCO не знайдено.")
 
@@ -942,8 +1187,9 @@ class BotCore:
 
             # Крок 5: Ініціалізація WebSocket Handler
             logger.debug("start(): Ініціалізація WebSocket Handler...")
-            # Отримуємо інтервал з конфігу
-            kline_interval_from_config = self.config.get('kline_interval', '1m')
+            self._ws_connected_event.clear()
+            # Інтервал вже прочитано з конфігу в _load_bot_settings
+            kline_interval_from_config = self.kline_interval
             logger.info(f"start(): Використання інтервалу свічок для WS: {kline_interval_from_config}")
             # Формуємо список потоків (з конфігурованим інтервалом)
             stream_symbol = self.symbol.lower()
@@ -961,7 +1207,8 @@ class BotCore:
                 callbacks=ws_callbacks,
                 use_testnet=self.use_testnet, # Використовуємо поточний режим ядра
                 api=self.binance_api,
-                ws_log_level=logging.DEBUG # Залишаємо DEBUG для діагностики
+                ws_log_level=logging.DEBUG, # Залишаємо DEBUG для діагностики
+                connected_event=self._ws_connected_event
             )
             # Зберігаємо екземпляр
             self.ws_handler = ws_handler_instance
@@ -976,24 +1223,8 @@ class BotCore:
             # Крок 6: Очікування підключення WebSocket
             ws_connect_timeout = 10 # Секунд
             logger.info(f"start(): Очікування підключення WebSocket ({ws_connect_timeout} сек)...")
-            wait_start_time = time.time()
-            ws_connected = False
-            # Цикл очікування
-            while True:
-                 current_time = time.time()
-                 elapsed_time = current_time - wait_start_time
-                 # Перевіряємо таймаут
-                 if elapsed_time >= ws_connect_timeout:
-                      break # Виходимо, якщо час вийшов
-                 # Перевіряємо з'єднання
-                 current_ws_handler = self.ws_handler
-                 if current_ws_handler:
-                      is_conn = current_ws_handler.is_connected()
-                      if is_conn:
-                           ws_connected = True
-                           break # Виходимо, якщо підключено
-                 # Невелика пауза
-                 time.sleep(0.5)
+            # Прокидаємось одразу при відкритті з'єднання (без опитування is_connected)
+            ws_connected = self._ws_connected_event.wait(timeout=ws_connect_timeout)
 
             # Перевіряємо результат очікування
             if not ws_connected:
@@ -1033,11 +1264,20 @@ class BotCore:
                  else:
                       logger.warning("start(): Потік обробника команд був перезапущений.")
 
+            # Очікуємо завершення фонової перевірки OCO (винятки передаються в обробник нижче)
+            if oco_check_future is not None:
+                try:
+                    oco_check_future.result(timeout=self.OCO_STARTUP_CHECK_TIMEOUT)
+                except FutureTimeoutError:
+                    logger.error("start(): Перевірка OCO не завершилась за %.0f с. Продовжуємо запуск, перевірка триває у фоні.",
+                                 self.OCO_STARTUP_CHECK_TIMEOUT)
+
             # Крок 8: Встановлення фінального статусу та часу
             self.is_running = True
             self.start_time = datetime.now(timezone.utc)
-            start_time_str = self.start_time.strftime('%Y-%m-%d %H:%M:%S %Z')
-            logger.info(f"=== BotCore УСПІШНО ЗАПУЩЕНО о {start_time_str} ===")
+            if logger.isEnabledFor(logging.INFO):
+                start_time_str = self.start_time.strftime('%Y-%m-%d %H:%M:%S %Z')
+                logger.info(f"=== BotCore УСПІШНО ЗАПУЩЕНО о {start_time_str} ===")
             # Надсилаємо подію про успішний запуск
             status_payload = self.get_status()
             status_update_event = {'type':'STATUS_UPDATE', 'payload': status_payload}
@@ -1046,6 +1286,14 @@ class BotCore:
         except Exception as start_e:
             # Обробка будь-яких помилок під час запуску
             logger.critical(f"Критична помилка під час старту BotCore: {start_e}", exc_info=True)
+            # Фонова перевірка OCO не повинна працювати після невдалого старту: скасовуємо або чекаємо завершення
+            if oco_check_future is not None and not oco_check_future.cancel():
+                try:
+                    oco_check_future.result(timeout=self.OCO_STARTUP_CHECK_TIMEOUT)
+                except FutureTimeoutError:
+                    logger.error("start(): Перевірка OCO не завершилась за %.0f с після помилки старту.", self.OCO_STARTUP_CHECK_TIMEOUT)
+                except Exception as oco_check_e:
+                    logger.error(f"start(): Помилка фонової перевірки OCO: {oco_check_e}")
             logger.info("start(): Викликаємо self.stop() через помилку...")
             # Викликаємо повну зупинку для очищення ресурсів
             self.stop()
@@ -1066,6 +1314,20 @@ class BotCore:
 
         # Встановлюємо прапорець is_running в False перш за все
         self.is_running = False
+        self._ws_connected_event.clear()
+
+        # Чекаємо незавершені розміщення OCO (спільний таймаут), далі закриваємо спільний пул:
+        # задачі в черзі скасовуються, потоки-демони завершуються після поточних задач
+        executor = self._executor
+        if executor is not None:
+            pending_oco = list(self._pending_oco_futures)
+            if pending_oco:
+                logger.info("Очікування %d незавершених розміщень OCO...", len(pending_oco))
+                _, not_done_oco = wait_futures(pending_oco, timeout=self.OCO_PLACEMENT_STOP_TIMEOUT)
+                if not_done_oco:
+                    logger.warning("%d розміщень OCO не завершились за %.0f с.", len(not_done_oco), self.OCO_PLACEMENT_STOP_TIMEOUT)
+            executor.shutdown(cancel_futures=True)
+            self._executor = None
 
         # Зупиняємо WebSocket Handler
         ws_handler_instance = self.ws_handler
@@ -1101,13 +1363,14 @@ class BotCore:
         # Викликаємо метод StateManager для збереження
         self.state_manager._save_state_to_file()
 
-        # Логуємо фінальний стан та статистику
-        final_stats = self.get_session_stats() # Отримуємо статистику сесії
-        stop_time_str = stop_time.strftime('%Y-%m-%d %H:%M:%S %Z')
-        logger.info(f"BotCore зупинено о {stop_time_str}.")
-        # Використовуємо json.dumps з default=str для безпечного логування статистики
-        stats_json_str = json.dumps(final_stats, indent=2, default=str)
-        logger.info(f"Статистика сесії: {stats_json_str}")
+        # Логуємо фінальний стан та статистику (форматуємо лише якщо INFO буде виведено)
+        if logger.isEnabledFor(logging.INFO):
+            final_stats = self.get_session_stats() # Отримуємо статистику сесії
+            stop_time_str = stop_time.strftime('%Y-%m-%d %H:%M:%S %Z')
+            logger.info(f"BotCore зупинено о {stop_time_str}.")
+            # json.dumps з default=str для безпечного логування; без indent - компактно і швидше
+            stats_json_str = json.dumps(final_stats, default=str)
+            logger.info(f"Статистика сесії: {stats_json_str}")
         # Надсилаємо фінальний статус (має показати is_running=False)
         final_status_payload = self.get_status()
         status_update_event = {'type':'STATUS_UPDATE', 'payload': final_status_payload}
@@ -1129,6 +1392,7 @@ class BotCore:
              return
 
         logger.debug("Запуск потоку обробника команд...")
+        self._cmd_processor_ready.clear()
         # Створюємо новий потік
         new_thread = threading.Thread(
             target=self._command_processor_loop,
@@ -1140,12 +1404,12 @@ class BotCore:
         # Запускаємо потік
         self.command_processor_thread.start()
 
-        # Невелика пауза, щоб дати потоку час запуститись
-        time.sleep(0.1)
+        # Чекаємо, поки потік дійде до очікування команд (замість фіксованої паузи)
+        is_new_thread_ready = self._cmd_processor_ready.wait(timeout=2.0)
 
         # Перевіряємо, чи новий потік справді запустився
         is_new_thread_alive = False
-        if self.command_processor_thread: # Перевірка на None
+        if is_new_thread_ready and self.command_processor_thread: # Перевірка на None
              is_new_thread_alive = self.command_processor_thread.is_alive()
 
         if not is_new_thread_alive:
@@ -1177,12 +1441,8 @@ class BotCore:
                  # Надсилаємо спеціальну команду, щоб розблокувати command_queue.get()
                  command_queue_exists = self.command_queue is not None
                  if command_queue_exists:
-                     # Використовуємо put з невеликим таймаутом
-                     try:
-                          stop_command = {'type':'STOP_INTERNAL'}
-                          self.command_queue.put(stop_command, timeout=0.5)
-                     except queue.Full:
-                           logger.error("_stop_command_processor: Не вдалося додати STOP_INTERNAL до черги команд (переповнена).")
+                     # Черга необмежена - put не блокується
+                     self.command_queue.put(_CMD_STOP_SENTINEL)
 
                  # Чекаємо завершення потоку (з таймаутом)
                  thread_to_stop.join(timeout=2.5)
@@ -1199,26 +1459,29 @@ class BotCore:
              logger.debug("Обробник команд не був активний.")
         # Скидаємо посилання на потік у будь-якому випадку
         self.command_processor_thread = None
+        self._cmd_processor_ready.clear()
 
     def _command_processor_loop(self):
         """Цикл, що обробляє команди з command_queue."""
         # Цей лог тепер має з'являтися при ініціалізації BotCore
         logger.info("Потік Command processor запущено...")
+        # Сигналізуємо _start_command_processor, що цикл готовий приймати команди
+        self._cmd_processor_ready.set()
         # Постійний цикл, вихід через команду STOP_INTERNAL
         while True:
             try:
-                # Очікуємо команду з черги
-                command = self.command_queue.get(timeout=1)
+                # Блокуюче очікування без таймауту: потік спить до появи команди,
+                # _stop_command_processor розблоковує його через STOP_INTERNAL
+                command = self.command_queue.get()
+
+                # Перевірка на спеціальну команду зупинки (за ідентичністю об'єкта)
+                if command is _CMD_STOP_SENTINEL:
+                    logger.info("Command processor отримав STOP_INTERNAL. Завершення роботи...")
+                    break # Виходимо з циклу while True
 
                 # Обробляємо команду, якщо вона є
                 if command:
                     cmd_type = command.get('type')
-                    # Перевірка на спеціальну команду зупинки
-                    if cmd_type == 'STOP_INTERNAL':
-                        logger.info("Command processor отримав STOP_INTERNAL. Завершення роботи...")
-                        # Позначаємо завдання як виконане перед виходом
-                        self.command_queue.task_done()
-                        break # Виходимо з циклу while True
 
                     # Перевіряємо self.is_running для команд, що потребують активного ядра
                     process_command_flag = True # За замовчуванням обробляємо
@@ -1242,15 +1505,8 @@ class BotCore:
                         # Викликаємо основний обробник команди
                         self.process_command(command)
 
-                    # Позначаємо завдання в черзі як виконане
-                    self.command_queue.task_done()
-
-            except queue.Empty:
-                # Якщо черга порожня, просто продовжуємо цикл очікування
-                # Це нормальна ситуація, не логуємо нічого
-                continue
             except Exception as e:
-                # Логуємо будь-які інші помилки в циклі обробника
+                # Логуємо будь-які помилки в циклі обробника
                 logger.error(f"Помилка cmd processor: {e}", exc_info=True)
                 # Невелика пауза перед наступною спробою
                 time.sleep(1)
@@ -1330,44 +1586,36 @@ class BotCore:
             # --- ЦЕЙ ЛОГ ТЕПЕР МАЄ З'ЯВИТИСЯ ---
             logger.debug(f"Kline Closed: {symbol} | T:{kline_dt_str} | C:{kline_close_price_str}")
 
-            # Формуємо дані для DataFrame
-            new_kline_dict = {
-                'open': Decimal(kline_data.get('o', 'NaN')), # Додано get з дефолтом NaN
-                'high': Decimal(kline_data.get('h', 'NaN')),
-                'low': Decimal(kline_data.get('l', 'NaN')),
-                'close': Decimal(kline_data.get('c', 'NaN')),
-                'volume': Decimal(kline_data.get('v', 'NaN')),
-                'num_trades': int(kline_data.get('n', 0)),
-                'quote_asset_volume': Decimal(kline_data.get('q', 'NaN')),
-                'taker_base_vol': Decimal(kline_data.get('V', 'NaN')),
-                'taker_quote_vol': Decimal(kline_data.get('Q', 'NaN')),
-            }
-            new_kline_df = pd.DataFrame([new_kline_dict], index=[kline_start_dt])
+            # Формуємо рядок буфера (float64, порядок KLINE_COLUMNS)
+            new_kline_row = (
+                float(kline_data.get('o', 'nan')), # Додано get з дефолтом NaN
+                float(kline_data.get('h', 'nan')),
+                float(kline_data.get('l', 'nan')),
+                float(kline_data.get('c', 'nan')),
+                float(kline_data.get('v', 'nan')),
+                float(kline_data.get('q', 'nan')),
+                float(kline_data.get('n', 0)),
+                float(kline_data.get('V', 'nan')),
+                float(kline_data.get('Q', 'nan')),
+            )
 
             buffer_copy_for_strategy = None # Ініціалізуємо
 
             # Оновлюємо буфер Klines під блокуванням StateManager
             with self.state_manager.lock:
-                current_buffer = self.klines_buffer
-                # Видаляємо рядок з таким самим індексом, якщо він є
-                index_exists = kline_start_dt in current_buffer.index
-                if index_exists:
-                     current_buffer = current_buffer.drop(kline_start_dt)
-                # Додаємо новий рядок і сортуємо
-                updated_buffer = pd.concat([current_buffer, new_kline_df]).sort_index()
-                # Обмежуємо розмір буфера
+                # Місткість буфера слідує за required_klines_length (могла змінитись разом зі стратегією)
                 max_buffer_size = self.required_klines_length + 20
-                current_buffer_size = len(updated_buffer)
-                if current_buffer_size > max_buffer_size:
-                    slice_start_index = current_buffer_size - max_buffer_size # Виправлено для Python 3
-                    updated_buffer = updated_buffer.iloc[slice_start_index:] # Виправлено для Python 3
-                # Зберігаємо оновлений буфер та час
-                self.klines_buffer = updated_buffer
-                self.last_kline_update_time = kline_start_time_ms
-                # Створюємо копію для передачі в стратегію
-                buffer_copy_for_strategy = self.klines_buffer.copy()
-                current_buffer_len_log = len(buffer_copy_for_strategy)
-                logger.debug(f"Kline buffer updated. Size: {current_buffer_len_log}")
+                if len(self._klines_ts) != max_buffer_size:
+                    self._resize_klines_ring(max_buffer_size)
+                # Записуємо свічку в кільце (той самий час відкриття - перезапис слота)
+                kline_stored = self._append_kline_to_ring(kline_start_time_ms, new_kline_row)
+                if kline_stored:
+                    self.last_kline_update_time = max(self.last_kline_update_time, kline_start_time_ms)
+                else:
+                    logger.warning("Свічка %s старіша за буфер Klines - пропущено.", kline_dt_str)
+                # Новий DataFrame для передачі в стратегію
+                buffer_copy_for_strategy = self.get_klines_df()
+                logger.debug("Kline buffer updated. Size: %d", self._klines_count)
 
             # Виклик стратегії поза блокуванням
             strategy_exists = self.strategy is not None
@@ -1396,6 +1644,7 @@ class BotCore:
             logger.error(f"Помилка обробки оновлення Kline: {e}", exc_info=True)
 
 
+    @_in_decimal_context
     def _handle_order_update(self, order_data: dict, event_time: int):
         """Обробляє оновлення статусу ордера (з User Data Stream). Використовує StateManager."""
         bot_is_running = self.is_running
@@ -1424,16 +1673,16 @@ class BotCore:
                  return
 
             # --- Конвертація в Decimal ---
-            filled_qty_cumulative = Decimal(filled_qty_cumulative_str)
-            last_filled_price = Decimal(last_filled_price_str)
+            filled_qty_cumulative = to_decimal(filled_qty_cumulative_str)
+            last_filled_price = to_decimal(last_filled_price_str)
             # Визначаємо ціну виконання (середню або останню)
-            avg_price = Decimal(avg_price_str)
+            avg_price = to_decimal(avg_price_str)
             if avg_price == 0: # Якщо середня ціна 0, використовуємо останню
                  avg_price = last_filled_price
             # Визначаємо комісію
             commission_amount = Decimal(0)
             if commission_amount_str:
-                 commission_amount = Decimal(commission_amount_str)
+                 commission_amount = to_decimal(commission_amount_str)
             # Конвертація OrderListId в int, якщо можливо
             order_list_id = -1 # Дефолтне значення
             if order_list_id_str is not None:
@@ -1456,7 +1705,7 @@ class BotCore:
             pnl_calculated = None
             total_commission_for_trade = None
             oco_cancellation_thread = None
-            oco_placement_thread = None
+            oco_placement_args = None
             emergency_exit_thread = None
 
             # --- Оновлення історії угод ---
@@ -1467,7 +1716,7 @@ class BotCore:
 
             if should_log_trade:
                 last_filled_qty_str = order_data.get('l', '0')
-                last_filled_qty = Decimal(last_filled_qty_str)
+                last_filled_qty = to_decimal(last_filled_qty_str)
                 is_maker = order_data.get('m', False)
                 # Отримуємо призначення ордера з активних
                 internal_order_id_log = client_order_id # Починаємо з Client ID
@@ -1546,8 +1795,7 @@ class BotCore:
                             qty_log_str_entry = f"{filled_qty_cumulative:.{self.qty_precision}f}"
                             price_log_str_entry = f"{avg_price:.{self.price_precision}f}"
                             notification_message = f"✅ ВХІД {symbol}: {qty_log_str_entry} @ {price_log_str_entry}"
-                            oco_thread_name_entry = f"OCOPlacement-{client_order_id[:8]}"
-                            oco_placement_thread = threading.Thread(target=self._place_oco_order, args=(symbol, filled_qty_cumulative, avg_price), daemon=True, name=oco_thread_name_entry)
+                            oco_placement_args = (symbol, filled_qty_cumulative, avg_price)
 
                     # Обробка виконаного ордера на ВИХІД
                     elif order_purpose in ['TP', 'SL', 'EXIT_MANUAL', 'EXIT_SIGNAL', 'EXIT_PROTECTION']:
@@ -1701,9 +1949,9 @@ class BotCore:
             if notification_message:
                  notify_payload = {'message': notification_message}
                  self._put_event({'type':'NOTIFICATION', 'payload': notify_payload})
-            if oco_placement_thread:
-                 logger.debug(f"Запуск потоку OCO Placement: {oco_placement_thread.name}")
-                 oco_placement_thread.start()
+            if oco_placement_args:
+                 logger.debug(f"Запуск OCO Placement для {client_order_id[:8]} у пулі OCO")
+                 self._submit_oco_placement(*oco_placement_args)
             if oco_cancellation_thread:
                  logger.debug(f"Запуск потоку OCO Cancellation: {oco_cancellation_thread.name}")
                  oco_cancellation_thread.start()
@@ -2014,6 +2262,7 @@ class BotCore:
         exit_thread.start()
 # END BLOCK 10
 # BLOCK 11: Order Helper Methods
+    @_in_decimal_context
     def _adjust_quantity(self, quantity: Decimal) -> Decimal | None:
         """Коригує кількість відповідно до фільтрів LOT_SIZE."""
         # Отримуємо інформацію про символ
@@ -2099,6 +2348,7 @@ class BotCore:
              logger.error(f"Помилка обробки фільтру LOT_SIZE: {e}. Фільтр: {lot_size_filter}")
              return None # Повертаємо None у разі помилки
 
+    @_in_decimal_context
     def _check_min_notional(self, quantity: Decimal, price: Decimal) -> bool:
         """Перевіряє, чи проходить ордер фільтр MIN_NOTIONAL."""
         # Перевіряємо наявність інфо символу
@@ -2173,6 +2423,7 @@ class BotCore:
             logger.error(f"Помилка обробки фільтру MIN_NOTIONAL: {e}. Фільтр: {notional_filter}")
             return False # Вважаємо, що не пройшло, якщо помилка
 
+    @_in_decimal_context
     def _calculate_position_size(self) -> Decimal | None:
         """Розраховує розмір позиції на основі доступного балансу та налаштувань."""
         logger.debug("Розрахунок розміру позиції...")
@@ -2190,7 +2441,7 @@ class BotCore:
                       quote_bal = free_balance_value
                  else: # Спроба конвертації, якщо тип інший
                       try:
-                           quote_bal = Decimal(str(free_balance_value))
+                           quote_bal = to_decimal(free_balance_value)
                       except (InvalidOperation, TypeError):
                             logger.warning(f"Некоректний тип вільного балансу для {self.quote_asset}: {type(free_balance_value)}")
                             quote_bal = Decimal(0)
@@ -2222,19 +2473,12 @@ class BotCore:
             last_price = None
             # Використовуємо lock StateManager для доступу до буфера klines
             with self.state_manager.lock:
-                # Перевіряємо, чи буфер не порожній і має колонку 'close'
-                buffer_exists = not self.klines_buffer.empty
-                close_col_exists = 'close' in self.klines_buffer.columns
-                if buffer_exists and close_col_exists:
-                    # Отримуємо останнє значення ціни закриття
-                    last_price_candidate = self.klines_buffer['close'].iloc[-1]
-                    # Перевіряємо, чи це валідний Decimal і не NaN
-                    value_is_decimal = isinstance(last_price_candidate, Decimal)
-                    value_is_not_nan = pd.notna(last_price_candidate)
-                    if value_is_decimal and value_is_not_nan:
-                         last_price = last_price_candidate # Використовуємо ціну з буфера
-                    else:
-                         logger.warning("Остання ціна в буфері Klines є NaN або некоректного типу.")
+                # Читаємо ціну закриття прямо з кільцевого буфера (без побудови DataFrame)
+                buffer_exists = self._klines_count > 0
+                if buffer_exists:
+                    last_price = self._last_kline_close()
+                    if last_price is None:
+                         logger.warning("Остання ціна в буфері Klines є NaN.")
 
             # Якщо ціну не знайдено в буфері, запитуємо з API
             if last_price is None or last_price <= 0:
@@ -2256,7 +2500,7 @@ class BotCore:
                 logger.info(f"Використовується поточна ціна з API: {last_price}")
 
             # Продовжуємо розрахунок з отриманою ціною
-            current_price = Decimal(str(last_price)) # Переконуємось, що це Decimal
+            current_price = to_decimal(last_price) # Переконуємось, що це Decimal
             # Розраховуємо "грубу" кількість базового активу
             quantity_gross = quote_amount_to_invest / current_price
             qty_gross_str = f"{quantity_gross:.8f}"
@@ -2389,6 +2633,7 @@ class BotCore:
             self._put_event({'type':'ERROR', 'payload': error_payload_general})
 
 
+    @_in_decimal_context
     def _place_oco_order(self, symbol: str, quantity: Decimal, entry_price: Decimal):
         """Розміщує OCO ордер (TP + SL). Виконується в окремому потоці."""
         # Перевіряємо наявність інфо про символ
@@ -2819,8 +3064,8 @@ class BotCore:
 
         # Читаємо локальну статистику (немає потреби в lock, якщо оновлення тільки в одному потоці)
         current_session_stats = self.session_stats
-        # Робимо глибоку копію
-        stats_local_copy = copy.deepcopy(current_session_stats)
+        # Словник зі слотів SessionStats (значення - незмінні цілі числа)
+        stats_local_copy = {field_name: getattr(current_session_stats, field_name) for field_name in SessionStats.__slots__}
 
         # Розраховуємо тривалість сесії
         is_bot_running_now = self.is_running
@@ -2836,18 +3081,29 @@ class BotCore:
         # Додаємо тривалість до копії статистики
         stats_local_copy['session_duration'] = duration_str
 
-        # Конвертуємо значення Decimal у float для зручності UI/JSON
-        final_stats_float = {}
-        # Ітеруємо по скопійованому словнику
-        for key, value in stats_local_copy.items():
-            # Перевіряємо тип значення
-            is_decimal_value = isinstance(value, Decimal)
-            if is_decimal_value:
-                # Конвертуємо в float
-                final_stats_float[key] = float(value)
-            else:
-                # Залишаємо значення як є
-                final_stats_float[key] = value
+        # Суми: цілі в одиницях 1/SESSION_STATS_SCALE -> float; похідні метрики рахуються тут, а не на кожну угоду
+        scale = self.SESSION_STATS_SCALE
+        total_trades = stats_local_copy.get('total_trades', 0)
+        wins = stats_local_copy.get('winning_trades', 0)
+        losses = stats_local_copy.get('losing_trades', 0)
+        total_profit_units = stats_local_copy.get('total_profit', 0)
+        total_loss_units = stats_local_copy.get('total_loss', 0)
+        final_stats_float = stats_local_copy
+        for key in ('total_pnl', 'total_commission', 'total_profit', 'total_loss'):
+            final_stats_float[key] = stats_local_copy.get(key, 0) / scale
+
+        # Win Rate (%)
+        final_stats_float['win_rate'] = wins * 100.0 / total_trades if total_trades > 0 else 0.0
+        # Profit Factor (нескінченність, якщо збитків не було, але був прибуток)
+        if total_loss_units > 0:
+            final_stats_float['profit_factor'] = total_profit_units / total_loss_units
+        elif total_profit_units > 0:
+            final_stats_float['profit_factor'] = float('inf')
+        else:
+            final_stats_float['profit_factor'] = 0.0
+        # Середній прибуток / збиток
+        final_stats_float['avg_profit'] = total_profit_units / wins / scale if wins > 0 else 0.0
+        final_stats_float['avg_loss'] = total_loss_units / losses / scale if losses > 0 else 0.0
         # Повертаємо фінальний словник зі значеннями float
         return final_stats_float
 # END BLOCK 13
@@ -2,6 +2,7 @@
 # Фінальна консолідована версія (model-117)
 import streamlit as st
 import os
+import functools
 import importlib
 import importlib.util
 import sys
@@ -19,10 +20,14 @@ except ImportError:
     class BaseStrategy: # Коректна заглушка
         pass
 
+@functools.lru_cache(maxsize=1)
 def load_strategies(strategies_dir: str = 'strategies') -> dict:
     """
     Динамічно завантажує класи стратегій з вказаної директорії.
     Шукає класи, що успадковуються від BaseStrategy.
+    Результат кешується: повторні виклики не сканують директорію і не
+    перезавантажують модулі. Для оновлення викликайте load_strategies.cache_clear().
+    Повернутий словник спільний для всіх викликів - не змінюйте його.
     """
     strategies = {}
     abs_strategies_dir = os.path.abspath(strategies_dir) # Абсолютний шлях
@@ -105,7 +110,8 @@ def show_strategies_tab(available_strategies: dict, config_manager: ConfigManage
          # Очистка кешу може допомогти підхопити нові файли або зміни в існуючих
          # Але це може вплинути на інші кешовані об'єкти (API, BotCore) - обережно!
          try:
-             st.cache_resource.clear() # Очищаємо кеш ресурсів (де може бути результат load_strategies?)
+             load_strategies.cache_clear() # Скидаємо кеш знайдених класів стратегій
+             st.cache_resource.clear() # Очищаємо кеш ресурсів
              logger.info("Очищено кеш ресурсів Streamlit.")
          except Exception as e:
               logger.error(f"Помилка очищення кешу ресурсів: {e}")
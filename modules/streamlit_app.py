@@ -145,7 +145,7 @@ def init_bot_core(_config_manager: ConfigManager):
     core_instance = None # Для обробки винятків
     try:
         # Створюємо черги для взаємодії
-        cmd_queue = queue.Queue()
+        cmd_queue = queue.SimpleQueue()
         evt_queue = queue.Queue()
         # Створюємо екземпляр BotCore, передаючи залежності
         core_instance = BotCore(
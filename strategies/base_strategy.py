@@ -44,7 +44,7 @@ class BaseStrategy(ABC):
         Має бути реалізовано у дочірніх класах.
 
         Args:
-            data (pd.DataFrame): DataFrame з історією Klines (очікується 'close' типу Decimal).
+            data (pd.DataFrame): DataFrame з історією Klines (числові колонки, зокрема 'close', типу float64).
 
         Returns:
             str or None: Торговий сигнал або None.
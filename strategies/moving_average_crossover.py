@@ -59,7 +59,7 @@ class MovingAverageCrossoverStrategy(BaseStrategy):
                  logger.debug(f"{log_prefix}: Недостатньо даних ({len(data)}/{self.required_klines_length}).")
                  return None
 
-            close_prices = data['close'].dropna() # Переконуємось, що працюємо з Decimal
+            close_prices = data['close'].dropna() # float64 колонка буфера Klines, без NaN
             if len(close_prices) < self.required_klines_length:
                 logger.debug(f"{log_prefix}: Недостатньо НЕ-NaN даних ({len(close_prices)}/{self.required_klines_length}).")
                 return None